@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from lib.Logger import Logger
+from lib.FeatureExtractor import FeatureExtractor
+from lib.DtypeOptimizer import DtypeOptimizer
+from lib.ScaleEncode import ScaleEncode
+from lib.useModel import useModel
+
+
+class BatchScorer:
+    def __init__(self, strategy_name, scale_encode, model, target_col="Is Fraud", datetime_col="Datetime",
+                 compact_dtypes=True):
+        """
+        Initialize the BatchScorer class.
+
+        Scores new transactions with a trained strategy: the strategy extracts the features,
+        the fitted ScaleEncode state scales and encodes them and the trained model returns the
+        fraud probabilities.
+
+        Parameters:
+        - strategy_name (str): Name of the strategy file without extension.
+        - scale_encode (ScaleEncode): Fitted ScaleEncode.
+        - model (useModel): Trained model.
+        - target_col (str): Target column, excluded from the model input.
+        - datetime_col (str): Datetime column, excluded from the model input.
+        - compact_dtypes (bool): Compact the extracted features as in training.
+        """
+        self.logger = Logger().get_logger(self.__class__.__name__)
+        self.strategy_name = strategy_name
+        self.feature_extractor = FeatureExtractor(strategy_name=strategy_name, data_path=None)
+        self.scale_encode = scale_encode
+        self.model = model
+        self.target_col = target_col
+        self.datetime_col = datetime_col
+        self.dtype_optimizer = DtypeOptimizer() if compact_dtypes else None
+
+    @classmethod
+    def load(cls, test_dir, strategy_name):
+        """
+        Creates a BatchScorer from the artifacts a StrategyTester run saved for a strategy.
+
+        Parameters:
+        - test_dir (str): Test directory, e.g. 'tests/test-1'.
+        - strategy_name (str): Name of the strategy file without extension.
+
+        Returns:
+        - BatchScorer: Scorer ready for score() and score_parquet().
+        """
+        with open(os.path.join(test_dir, "test_params.json")) as f:
+            params = json.load(f)
+        scale_encode_path = os.path.join(test_dir, f"{strategy_name}_scale_encode.joblib")
+        if not os.path.exists(scale_encode_path):
+            raise FileNotFoundError(f"No fitted preprocessing state at {scale_encode_path}; "
+                                    "run the test with fit_on_train to save it.")
+        return cls(strategy_name, ScaleEncode.load(scale_encode_path),
+                   useModel.load(os.path.join(test_dir, f"{strategy_name}_model.joblib")),
+                   target_col=params["target_col"], datetime_col=params["datetime_col"],
+                   compact_dtypes=params.get("compact_dtypes", False))
+
+    def score(self, df):
+        """
+        Returns the fraud probabilities of a DataFrame of transactions.
+
+        Features derived from earlier transactions (velocities, distances) only see the
+        transactions of the DataFrame.
+
+        Parameters:
+        - df (pd.DataFrame): Transactions with the columns the strategy reads.
+
+        Returns:
+        - pd.Series: Fraud probability of every row, indexed like the input rows.
+        """
+        if self.target_col not in df.columns:
+            df = df.assign(**{self.target_col: 0})  # Strategies pass the target through; new transactions have none
+        extracted_df = self._extract_features(df)
+        if self.dtype_optimizer is not None:
+            extracted_df = self.dtype_optimizer.optimize(extracted_df)
+        X = self.scale_encode.transform(extracted_df).drop(columns=[self.target_col, self.datetime_col], errors='ignore')
+        if self.model.feature_names is not None:
+            X = X[self.model.feature_names]
+        return pd.Series(self.model.predict_proba(X), index=X.index).reindex(df.index)
+
+    def _extract_features(self, df):
+        return self.feature_extractor.extract_from(df)
+
+    def score_parquet(self, data_path, save_to, batch_size=500_000, keep_columns=None, probability_col="fraud_probability",
+                      group_col="User"):
+        """
+        Streams a parquet file of transactions through the scorer, batch by batch, writing the probabilities.
+
+        Only the columns the strategy reads (and keep_columns) are read, and peak memory is
+        about one batch. Rows per second are logged for every batch and for the whole file.
+
+        Features built from earlier transactions (rolling, velocity, distance, time since the
+        last transaction) only see the transactions scored together. With the file sorted by
+        group_col, the rows of the last group of every batch are held back and scored with the
+        next batch, so every group is scored with its whole history in the file and the scores
+        do not depend on batch_size. Otherwise a warning is logged: these features then restart
+        at every batch and for every group split across batches.
+
+        Parameters:
+        - data_path (str): Parquet file of transactions to score.
+        - save_to (str): Parquet file to write.
+        - batch_size (int): Number of rows per batch.
+        - keep_columns (list, optional): Input columns copied to the output next to the probability, e.g. identifiers;
+          a ValueError is raised before any batch is read if one is missing from the file.
+        - probability_col (str): Name of the probability column.
+        - group_col (str): Column identifying the entity whose history the features use.
+
+        Returns:
+        - dict: Number of rows, elapsed seconds and rows per second.
+        """
+        keep_columns = list(keep_columns or [])
+        parquet_file = pq.ParquetFile(data_path)
+        available = set(parquet_file.schema_arrow.names)
+        missing = [col for col in keep_columns if col not in available]
+        if missing:
+            raise ValueError(f"keep_columns missing from {data_path}: {missing}")
+        columns = self.feature_extractor.columns
+        if columns is not None:
+            columns = [col for col in dict.fromkeys(columns + keep_columns) if col in available]
+
+        writer, rows, start = None, 0, time.perf_counter()
+        held_back, grouped = None, True
+        try:
+            for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+                df = batch.to_pandas()
+                if held_back is not None:
+                    df = pd.concat([held_back, df], ignore_index=True)
+                    held_back = None
+                if grouped and group_col in df.columns:
+                    if df[group_col].is_monotonic_increasing:
+                        # The last group may continue in the next batch
+                        in_last_group = (df[group_col] == df[group_col].iat[-1]).to_numpy()
+                        cut = len(df) - int(in_last_group[::-1].argmin()) if not in_last_group.all() else 0
+                        held_back, df = df.iloc[cut:], df.iloc[:cut]
+                    else:
+                        grouped = False
+                        self.logger.warning("%s is not sorted by '%s': history features restart at every batch of %d rows "
+                                            "and for every %s split across batches, so the scores depend on batch_size. "
+                                            "Sort the file by '%s' to score every %s with its whole history.",
+                                            data_path, group_col, batch_size, group_col, group_col, group_col)
+                if len(df):
+                    rows += len(df)
+                    writer = self._write_scores(df, writer, save_to, keep_columns, probability_col, rows)
+            if held_back is not None and len(held_back):
+                rows += len(held_back)
+                writer = self._write_scores(held_back, writer, save_to, keep_columns, probability_col, rows)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        elapsed = time.perf_counter() - start
+        rows_per_second = rows / max(elapsed, 1e-9)
+        self.logger.info("Scored %d rows of %s with %s in %.1f s: %.0f rows/s, saved to %s",
+                         rows, data_path, self.strategy_name, elapsed, rows_per_second, save_to)
+        return {'rows': rows, 'seconds': elapsed, 'rows_per_second': rows_per_second}
+
+    def _write_scores(self, df, writer, save_to, keep_columns, probability_col, rows):
+        """Scores a batch and appends it to the output file, opening the writer on the first batch."""
+        batch_start = time.perf_counter()
+        output = df[keep_columns].assign(**{probability_col: self.score(df).to_numpy()})
+        table = pa.Table.from_pandas(output, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(save_to, table.schema)
+        writer.write_table(table)
+        self.logger.info("Scored %d rows at %.0f rows/s (%d so far)", len(df),
+                         len(df) / max(time.perf_counter() - batch_start, 1e-9), rows)
+        return writer
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+
+class CategoryEncoder:
+    METHODS = ('frequency', 'target', 'hashing')
+
+    def __init__(self, method='frequency', n_buckets=16, n_folds=5, smoothing=20.0, random_state=42):
+        """
+        Initialize the CategoryEncoder class.
+
+        Encodes a high-cardinality categorical column into a fixed number of numeric columns,
+        whatever the number of categories:
+        - 'frequency': share of the training rows having the category (one column).
+        - 'target': smoothed mean of the target per category (one column), out-of-fold on the
+          training rows so a row's own label never contributes to its encoding.
+        - 'hashing': indicator of the hash bucket of the category (n_buckets columns).
+
+        Parameters:
+        - method (str): Encoding method, one of CategoryEncoder.METHODS.
+        - n_buckets (int): Number of hash buckets for 'hashing'.
+        - n_folds (int): Number of folds of the out-of-fold target encoding.
+        - smoothing (float): Weight of the global target mean in the per-category mean.
+        - random_state (int): Seed of the fold assignment.
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unsupported encoding method '{method}': choose one of {self.METHODS}.")
+        self.method = method
+        self.n_buckets = n_buckets
+        self.n_folds = n_folds
+        self.smoothing = smoothing
+        self.random_state = random_state
+        self.name = None
+        self.categories = None
+        self.table = None
+
+    def fit(self, series, target=None):
+        """
+        Learns the per-category statistics from the training rows.
+
+        Parameters:
+        - series (pd.Series): Categorical column.
+        - target (pd.Series): Binary target aligned with the column (required for 'target').
+
+        Returns:
+        - CategoryEncoder: The fitted instance.
+        """
+        self.fit_transform(series, target)
+        return self
+
+    def fit_transform(self, series, target=None):
+        """
+        Fits the encoder and returns the encoding of the training rows.
+
+        For 'target' the returned values are out-of-fold: each row is encoded with the
+        statistics of the other folds, while transform() later uses all training rows.
+
+        Parameters:
+        - series (pd.Series): Categorical column.
+        - target (pd.Series): Binary target aligned with the column (required for 'target').
+
+        Returns:
+        - pd.DataFrame: Encoded columns aligned with the input column.
+        """
+        self.name = series.name
+        series = self._values(series)
+        codes, categories = pd.factorize(series, use_na_sentinel=False)
+        self.categories = pd.Index(categories)
+        counts = np.bincount(codes, minlength=len(categories)).astype(np.float64)
+
+        if self.method == 'frequency':
+            self.table = np.append(counts / max(len(series), 1), 0.0)  # Unseen categories last
+            return self.transform(series)
+
+        if self.method == 'hashing':
+            self.categories = self.categories[:0]  # Stateless, the buckets only depend on the values
+            return self.transform(series)
+
+        if target is None:
+            raise ValueError("Target encoding requires the target column.")
+        target = np.asarray(target, dtype=np.float64)
+        prior = float(target.mean()) if len(target) else 0.0
+        sums = np.bincount(codes, weights=target, minlength=len(categories))
+        self.table = np.append(self._smoothed(sums, counts, prior), prior)
+
+        # Out-of-fold statistics: category totals minus the totals of the row's own fold
+        folds = np.random.default_rng(self.random_state).permutation(len(codes)) % self.n_folds
+        keys = folds * len(categories) + codes
+        fold_sums = np.bincount(keys, weights=target, minlength=self.n_folds * len(categories))
+        fold_counts = np.bincount(keys, minlength=self.n_folds * len(categories))
+        encoded = self._smoothed(sums[codes] - fold_sums[keys], counts[codes] - fold_counts[keys], prior)
+        return pd.DataFrame({f"{self.name}_target": encoded}, index=series.index)
+
+    def transform(self, series):
+        """
+        Encodes a column with the fitted statistics.
+
+        Parameters:
+        - series (pd.Series): Categorical column.
+
+        Returns:
+        - pd.DataFrame: Encoded columns aligned with the input column.
+        """
+        if self.categories is None:
+            raise ValueError("CategoryEncoder must be fitted before transform.")
+        series = self._values(series)
+
+        if self.method == 'hashing':
+            codes, categories = pd.factorize(series, use_na_sentinel=False)
+            buckets = pd.util.hash_array(np.asarray(categories, dtype=object).astype(str)) % self.n_buckets
+            row_buckets = buckets[codes]
+            return pd.DataFrame({f"{self.name}_hash_{bucket}": row_buckets == bucket for bucket in range(self.n_buckets)},
+                                index=series.index)
+
+        encoded = self.table[self.categories.get_indexer(series)]
+        return pd.DataFrame({f"{self.name}_{self.method}": encoded}, index=series.index)
+
+    @staticmethod
+    def _values(series):
+        # Look up categorical columns by their values, not by their category codes
+        return series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+
+    def _smoothed(self, sums, counts, prior):
+        return (sums + prior * self.smoothing) / (counts + self.smoothing)
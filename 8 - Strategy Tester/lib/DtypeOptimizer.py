@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from lib.Logger import Logger
+
+
+class DtypeOptimizer:
+    def __init__(self, float_dtype='float32', max_category_ratio=0.5, exclude=None, verbose=True):
+        """
+        Initialize the DtypeOptimizer class.
+
+        Compacts the extracted features before scaling and modelling: integers are downcast
+        to the smallest type holding their range, floats to float32, string columns with few
+        distinct values become categories, and object columns holding only True/False become
+        1-byte booleans.
+
+        Parameters:
+        - float_dtype (str): Target type of float columns (None keeps float64).
+        - max_category_ratio (float): Maximum ratio of distinct values to rows for a string column to become a category.
+        - exclude (list, optional): Columns to keep unchanged.
+        - verbose (bool): Log the memory saved (disable when compacting many small batches).
+        """
+        self.logger = Logger().get_logger(self.__class__.__name__)
+        self.float_dtype = float_dtype
+        self.max_category_ratio = max_category_ratio
+        self.exclude = set(exclude or [])
+        self.verbose = verbose
+
+    def optimize(self, df):
+        """
+        Returns a compacted copy of the DataFrame and logs the bytes saved per column.
+
+        Columns that are not changed are shared with the input DataFrame, not copied.
+
+        Parameters:
+        - df (pd.DataFrame): DataFrame to compact.
+
+        Returns:
+        - pd.DataFrame: DataFrame with compact column types.
+        """
+        columns = {}
+        total_before = total_after = 0
+        for col in df.columns:
+            series = df[col]
+            compact = series if col in self.exclude else self._compact(series)
+            before = series.memory_usage(index=False, deep=True)
+            after = compact.memory_usage(index=False, deep=True) if compact is not series else before
+            if after < before and self.verbose:
+                self.logger.info("Column '%s': %s -> %s, saved %.1f MB",
+                                 col, series.dtype, compact.dtype, (before - after) / 1024 ** 2)
+            columns[col] = compact
+            total_before += before
+            total_after += after
+
+        if self.verbose:
+            self.logger.info("Compacted DataFrame from %.1f MB to %.1f MB",
+                             total_before / 1024 ** 2, total_after / 1024 ** 2)
+        return pd.DataFrame(columns, index=df.index, copy=False)
+
+    def _compact(self, series):
+        """
+        Returns the compact version of a column, or the column itself if it cannot be compacted.
+
+        Parameters:
+        - series (pd.Series): Column to compact.
+
+        Returns:
+        - pd.Series: Compacted column.
+        """
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            return series
+        if pd.api.types.is_integer_dtype(dtype):
+            return pd.to_numeric(series, downcast='integer')
+        if pd.api.types.is_float_dtype(dtype):
+            if self.float_dtype is None or dtype == self.float_dtype:
+                return series
+            finite = series.to_numpy()[np.isfinite(series.to_numpy())]
+            if finite.size and np.abs(finite).max() > np.finfo(self.float_dtype).max:
+                return series  # Out of range for the smaller type
+            return series.astype(self.float_dtype)
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            distinct = series.nunique(dropna=False)
+            if series.notna().all() and distinct <= 2 and set(series.unique()) <= {True, False}:
+                return series.astype(bool)
+            if distinct <= self.max_category_ratio * len(series):
+                return series.astype('category')
+        return series
@@ -0,0 +1,369 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from lib.Logger import Logger
+from lib.GroupedRolling import GroupedRolling
+from lib.TimeWindowVelocity import TimeWindowVelocity
+from lib.GeoVelocity import GeoVelocity
+from lib.RiskLookup import RiskLookup
+from lib.TransactionReader import read_transactions, date_mask
+
+
+class FeatureCache:
+    def __init__(self, data_path=None, data=None, group_col='User', datetime_col='Datetime', columns=None, date_range=None):
+        """
+        Initialize the FeatureCache class.
+
+        The cache loads the transactions once, parses the datetime column, sorts the rows
+        by group and time, and memoizes derived columns by name so that every strategy
+        of a run can reuse them instead of recomputing.
+
+        Parameters:
+        - data_path (str): Path to the input parquet file (optional if data is provided).
+        - data (pd.DataFrame): DataFrame to be used directly (optional if data_path is provided).
+        - group_col (str): Column identifying the entity whose history is tracked.
+        - datetime_col (str): Column holding the transaction timestamp.
+        - columns (list, optional): Columns to read from data_path (all if not provided).
+        - date_range (tuple, optional): (start, end) dates of the rows to read from data_path.
+        """
+        self.logger = Logger().get_logger(self.__class__.__name__)
+        self.data_path = data_path
+        self.data = data
+        self.group_col = group_col
+        self.datetime_col = datetime_col
+        self.columns = None if columns is None else list(dict.fromkeys([group_col, datetime_col, *columns]))
+        self.date_range = date_range
+        self._frame = None
+        self._columns = {}
+        self._rolling = None
+        self._rolling_columns = {}
+        self._group_orders = {}
+        self._velocity = {}
+        self._velocity_columns = {}
+        self._geo_columns = {}
+        self._previous = {}
+        self._lookups = {}
+        if data_path is None and not isinstance(data, pd.DataFrame):
+            raise ValueError("Either data_path or data must be specified.")
+
+    def frame(self, columns=None, date_range=None):
+        """
+        Returns the shared base DataFrame, loading it on first use.
+
+        The returned frame is a shallow copy, so columns can be added or dropped freely,
+        but the underlying arrays are shared and must not be modified in place.
+
+        Parameters:
+        - columns (list, optional): Columns to project, e.g. the COLUMNS declared by a strategy.
+        - date_range (tuple, optional): (start, end) dates to keep, start inclusive and end exclusive.
+
+        Returns:
+        - pd.DataFrame: Parsed DataFrame sorted by group and datetime.
+        """
+        if self._frame is None:
+            self._frame = self._load()
+        frame = self._frame
+        if date_range is not None:
+            frame = frame[date_mask(frame[self.datetime_col], date_range)]
+        if columns is not None:
+            # Build the projection from the existing columns instead of copying them
+            return pd.DataFrame({column: frame[column] for column in columns}, copy=False)
+        return frame.copy(deep=False)
+
+    def to_arrow(self, path):
+        """
+        Writes the base DataFrame to an uncompressed Arrow IPC file for other processes.
+
+        Parameters:
+        - path (str): Path of the Arrow file to write.
+        """
+        if self._frame is None:
+            self._frame = self._load()
+        table = pa.Table.from_pandas(self._frame, preserve_index=True)
+        # Large strings, the layout pandas keeps Arrow strings in, so from_arrow maps them without a cast
+        table = table.cast(pa.schema([field.with_type(pa.large_string()) if pa.types.is_string(field.type) else field
+                                      for field in table.schema], metadata=table.schema.metadata))
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        self.logger.info("Base frame written to %s", path)
+
+    @classmethod
+    def from_arrow(cls, path, group_col='User', datetime_col='Datetime'):
+        """
+        Creates a cache on top of an Arrow file written by to_arrow.
+
+        The file is memory-mapped and the frame is already parsed and sorted. String columns and
+        numeric and datetime columns without missing values stay views of the mapped buffers, so
+        processes reading the file share the operating system's page cache for them; strings are
+        kept in Arrow as pandas 3's str dtype does, also on pandas 2.x. Other columns (e.g. dates
+        such as 'Acct Open Date') are copied into each process, and every process computes its
+        own derived columns.
+
+        Parameters:
+        - path (str): Path of the Arrow file.
+        - group_col (str): Column identifying the entity whose history is tracked.
+        - datetime_col (str): Column holding the transaction timestamp.
+
+        Returns:
+        - FeatureCache: Cache with the base frame loaded.
+        """
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        types_mapper = None
+        if int(pd.__version__.split('.')[0]) < 3:
+            # Arrow strings with NaN for missing values, instead of a copy as Python objects
+            strings = pd.StringDtype("pyarrow_numpy")
+            types_mapper = {pa.string(): strings, pa.large_string(): strings}.get
+        cache = cls(data=table.to_pandas(split_blocks=True, types_mapper=types_mapper), group_col=group_col,
+                    datetime_col=datetime_col)
+        cache._frame = cache.data
+        cache.logger.info("Base frame memory-mapped from %s", path)
+        return cache
+
+    def column(self, name):
+        """
+        Returns a derived column, computing it on first request.
+
+        Parameters:
+        - name (str): Name of a column registered in DERIVED_COLUMNS.
+
+        Returns:
+        - pd.Series: Derived column aligned with the base DataFrame.
+        """
+        if name not in self._columns:
+            if name not in self.DERIVED_COLUMNS:
+                raise KeyError(f"Unknown derived column: {name}")
+            if self._frame is None:
+                self._frame = self._load()
+            self._columns[name] = self.DERIVED_COLUMNS[name](self, self._frame)
+            self.logger.info("Computed derived column '%s'", name)
+        return self._columns[name]
+
+    def lookup(self, name):
+        """
+        Returns the result of a named risk lookup, computing it on first request.
+
+        Parameters:
+        - name (str): Name of a lookup registered with RiskLookup.register.
+
+        Returns:
+        - pd.Series: Flags or codes aligned with the base DataFrame.
+        """
+        if name not in self._lookups:
+            lookup = RiskLookup.get(name)
+            if self._frame is None:
+                self._frame = self._load()
+            self._lookups[name] = lookup.apply(self._frame[lookup.column])
+            self.logger.info("Computed risk lookup '%s' on '%s'", name, lookup.column)
+        return self._lookups[name]
+
+    def grouped(self, column):
+        """
+        Returns the base column grouped by the group column.
+
+        Parameters:
+        - column (str): Column of the base DataFrame to group.
+
+        Returns:
+        - pd.core.groupby.SeriesGroupBy: Grouped column.
+        """
+        if self._frame is None:
+            self._frame = self._load()
+        return self._frame.groupby(self.group_col, sort=False)[column]
+
+    def rolling(self, column, windows, stats=('count', 'mean', 'std'), min_periods=1):
+        """
+        Returns row-based rolling statistics of a base column within each group.
+
+        All requested windows and statistics are computed in a single vectorized pass and
+        memoized, so strategies asking for the same statistic share the result.
+
+        Parameters:
+        - column (str): Column of the base DataFrame to aggregate.
+        - windows (list): Window sizes in rows.
+        - stats (list): Statistics to compute, any of GroupedRolling.STATS.
+        - min_periods (int): Minimum number of observations required for a value.
+
+        Returns:
+        - dict: Mapping of (stat, window) to a pd.Series aligned with the base DataFrame.
+        """
+        if self._frame is None:
+            self._frame = self._load()
+        if self._rolling is None:
+            self._rolling = GroupedRolling(self._frame[self.group_col].to_numpy())
+
+        missing = [(stat, window) for stat in stats for window in windows
+                   if (column, stat, window, min_periods) not in self._rolling_columns]
+        if missing:
+            missing_stats = list(dict.fromkeys(stat for stat, _ in missing))
+            missing_windows = list(dict.fromkeys(window for _, window in missing))
+            computed = self._rolling.compute(self._frame[column].to_numpy(), missing_windows, missing_stats, min_periods)
+            for (stat, window), values in computed.items():
+                self._rolling_columns[(column, stat, window, min_periods)] = pd.Series(values, index=self._frame.index)
+            self.logger.info("Computed rolling %s of '%s' over windows %s", missing_stats, column, missing_windows)
+
+        return {(stat, window): self._rolling_columns[(column, stat, window, min_periods)]
+                for stat in stats for window in windows}
+
+    def velocity(self, group_cols, windows=('1h', '24h', '7D', '30D'), column='Amount', stats=('count', 'sum')):
+        """
+        Returns time-based rolling counts and sums within each group, e.g. per user or per card.
+
+        Parameters:
+        - group_cols (str or list): Columns identifying the group, e.g. 'User' or ['User', 'Card'].
+        - windows (list): Window lengths as pandas offset strings, e.g. '1h', '24h', '7D'.
+        - column (str): Column of the base DataFrame to sum.
+        - stats (list): Statistics to compute, any of TimeWindowVelocity.STATS.
+
+        Returns:
+        - dict: Mapping of (stat, window) to a pd.Series aligned with the base DataFrame.
+        """
+        group_cols = tuple([group_cols] if isinstance(group_cols, str) else group_cols)
+
+        missing = [(stat, window) for stat in stats for window in windows
+                   if (group_cols, column, stat, window) not in self._velocity_columns]
+        if missing:
+            order, groups = self._group_order(group_cols)
+            if group_cols not in self._velocity:
+                timestamps = self._in_group_order(self._frame[self.datetime_col].to_numpy(), order)
+                self._velocity[group_cols] = TimeWindowVelocity(groups, timestamps)
+            computed = self._velocity[group_cols].compute(self._in_group_order(self._frame[column].to_numpy(), order),
+                                                          list(dict.fromkeys(window for _, window in missing)),
+                                                          list(dict.fromkeys(stat for stat, _ in missing)))
+            for (stat, window), result in computed.items():
+                self._velocity_columns[(group_cols, column, stat, window)] = self._to_frame_order(result, order)
+            self.logger.info("Computed velocity %s of '%s' per %s", sorted(computed), column, list(group_cols))
+
+        return {(stat, window): self._velocity_columns[(group_cols, column, stat, window)]
+                for stat in stats for window in windows}
+
+    def geo(self, group_cols=None, latitude_col='Latitude', longitude_col='Longitude'):
+        """
+        Returns the haversine distance, time delta and implied travel speed between consecutive
+        transactions of the same group.
+
+        Parameters:
+        - group_cols (str or list, optional): Columns identifying the group (the group column by default).
+        - latitude_col (str): Latitude column in degrees.
+        - longitude_col (str): Longitude column in degrees.
+
+        Returns:
+        - dict: 'distance_km', 'hours_since_previous' and 'speed_kmh' pd.Series aligned with the base DataFrame,
+          NaN for the first transaction of each group.
+        """
+        group_cols = tuple([group_cols or self.group_col] if isinstance(group_cols, (str, type(None))) else group_cols)
+        key = (group_cols, latitude_col, longitude_col)
+        if key not in self._geo_columns:
+            order, groups = self._group_order(group_cols)
+            computed = GeoVelocity(groups).compute(
+                self._in_group_order(self._frame[latitude_col].to_numpy(), order),
+                self._in_group_order(self._frame[longitude_col].to_numpy(), order),
+                self._in_group_order(self._frame[self.datetime_col].to_numpy(), order),
+            )
+            self._geo_columns[key] = {name: self._to_frame_order(result, order) for name, result in computed.items()}
+            self.logger.info("Computed consecutive distance and speed per %s", list(group_cols))
+        return self._geo_columns[key]
+
+    def previous(self, column, group_cols=None):
+        """
+        Returns the value of a column at the previous transaction of the same group.
+
+        Parameters:
+        - column (str): Column of the base DataFrame.
+        - group_cols (str or list, optional): Columns identifying the group (the group column by default).
+
+        Returns:
+        - pd.Series: Previous values aligned with the base DataFrame, NaN for the first transaction of each group.
+        """
+        group_cols = tuple([group_cols or self.group_col] if isinstance(group_cols, (str, type(None))) else group_cols)
+        key = (group_cols, column)
+        if key not in self._previous:
+            if self._frame is None:
+                self._frame = self._load()
+            # The base frame is in time order within every group, whatever the grouping
+            self._previous[key] = self._frame.groupby(list(group_cols), sort=False)[column].shift()
+            self.logger.info("Computed previous '%s' per %s", column, list(group_cols))
+        return self._previous[key]
+
+    def _group_order(self, group_cols):
+        """
+        Returns (once per grouping) the row order in which the groups are contiguous and in time order.
+
+        The base frame is sorted by group column and datetime, so grouping by it needs no
+        reordering. Finer groupings such as ['User', 'Card'] use a stable sort of the group
+        codes, which keeps the rows of each group in time order.
+
+        Returns:
+        - tuple: Row order (None for the base order) and the group code of every row in that order.
+        """
+        if self._frame is None:
+            self._frame = self._load()
+        if group_cols not in self._group_orders:
+            if group_cols == (self.group_col,):
+                order, groups = None, self._frame[self.group_col].to_numpy()
+            else:
+                groups = self._frame.groupby(list(group_cols), sort=False).ngroup().to_numpy()
+                order = np.argsort(groups, kind='stable')
+                groups = groups[order]
+            self._group_orders[group_cols] = (order, groups)
+        return self._group_orders[group_cols]
+
+    @staticmethod
+    def _in_group_order(values, order):
+        return values if order is None else values[order]
+
+    def _to_frame_order(self, result, order):
+        """Scatters a result computed in group order back to a Series in base frame order."""
+        if order is not None:
+            unordered = np.empty_like(result)
+            unordered[order] = result
+            result = unordered
+        return pd.Series(result, index=self._frame.index)
+
+    def _load(self):
+        """
+        Reads, parses and sorts the base DataFrame.
+
+        Returns:
+        - pd.DataFrame: Base DataFrame sorted by group and datetime.
+        """
+        if self.data is not None:
+            df = self.data
+            self.logger.info("Building base frame from provided DataFrame.")
+        else:
+            self.logger.info("Loading base frame from %s (columns: %s, date range: %s)",
+                             self.data_path, self.columns or "all", self.date_range or "all")
+            df = read_transactions(self.data_path, self.columns, self.date_range, self.datetime_col)
+
+        if not pd.api.types.is_datetime64_any_dtype(df[self.datetime_col]):
+            df = df.assign(**{self.datetime_col: pd.to_datetime(df[self.datetime_col], errors='coerce')})
+        df = df.sort_values([self.group_col, self.datetime_col])
+        self.logger.info("Base frame ready: %d rows sorted by %s", len(df), [self.group_col, self.datetime_col])
+        return df
+
+    def _hour(self, df):
+        return df[self.datetime_col].dt.hour
+
+    def _day_of_week(self, df):
+        return df[self.datetime_col].dt.dayofweek
+
+    def _month_of_year(self, df):
+        return df[self.datetime_col].dt.month
+
+    def _is_weekend(self, df):
+        return self.column('DayOfWeek') >= 5
+
+    def _time_since_last_transaction(self, df):
+        # Minutes since the previous transaction of the same group, NaN for the first one
+        return self.grouped(self.datetime_col).diff().dt.total_seconds() / 60
+
+    def _account_age_days(self, df):
+        return (df[self.datetime_col] - pd.to_datetime(df['Acct Open Date'])).dt.days
+
+    DERIVED_COLUMNS = {
+        'Hour': _hour,
+        'DayOfWeek': _day_of_week,
+        'MonthOfYear': _month_of_year,
+        'IsWeekend': _is_weekend,
+        'TimeSinceLastTransaction': _time_since_last_transaction,
+        'Account Age (Days)': _account_age_days,
+    }
@@ -1,31 +1,133 @@
 import pandas as pd
+import polars as pl
+import inspect
 import importlib.util
 from lib.Logger import Logger
+from lib.TransactionReader import read_transactions
 
 
 class FeatureExtractor:
-    def __init__(self, strategy_name: str, data_path: str):
+    BACKENDS = ('pandas', 'polars')
+    ROW_INDEX = '__row_index__'  # Row number column carried through Polars strategies by extract_from()
+
+    def __init__(self, strategy_name: str, data_path: str, feature_cache=None):
         self.logger = Logger().get_logger(self.__class__.__name__)
         self.strategy_name = strategy_name
         self.data_path = data_path
+        self.feature_cache = feature_cache
+        self.backend = 'pandas'
+        self.columns = None
+        self.date_range = None
         self.strategy_function = self._load_strategy_function()
-        self.logger.info("Initialized with strategy: %s", strategy_name)
+        self.logger.info("Initialized with strategy: %s (%s backend)", strategy_name, self.backend)
 
     def extract_features(self):
-        self.logger.info("Starting feature extraction with data file: %s", self.data_path)
-        df = pd.read_parquet(self.data_path)
-        extracted_df = self.strategy_function(df)
+        if self.backend == 'polars':
+            return self._extract_features_polars()
+
+        if self.feature_cache is not None:
+            self.logger.info("Starting feature extraction with shared feature cache.")
+            df = self.feature_cache.frame(self.columns, self.date_range)
+        else:
+            self.logger.info("Starting feature extraction with data file: %s", self.data_path)
+            df = read_transactions(self.data_path, self.columns, self.date_range)
+
+        if self.feature_cache is not None and self._accepts_cache():
+            extracted_df = self.strategy_function(df, cache=self.feature_cache)
+            if self.date_range is not None:
+                # The cache's frame and primitives cover the rows of every strategy; keep those in DATE_RANGE
+                extracted_df = extracted_df[extracted_df.index.isin(df.index)]
+                self.logger.info("Kept %d rows in the date range %s", len(extracted_df), self.date_range)
+        else:
+            extracted_df = self.strategy_function(df)
         self.logger.info("Feature extraction completed for strategy: %s", self.strategy_name)
         return extracted_df
 
+    def extract_from(self, df, cache=None):
+        """
+        Runs the strategy on a DataFrame instead of the data file, e.g. a batch of new transactions.
+
+        Strategies may reorder the rows; the extracted rows keep the index labels of the
+        input rows so results can be aligned back to them. Polars strategies carry a row
+        number column through the query for this.
+
+        Parameters:
+        - df (pd.DataFrame): Transactions with the columns the strategy reads.
+        - cache (FeatureCache, optional): Cache passed to strategies that accept one, e.g. an OnlineFeatureCache.
+
+        Returns:
+        - pd.DataFrame: Extracted features.
+        """
+        if self.backend != 'polars':
+            if cache is not None and self._accepts_cache():
+                return self.strategy_function(df, cache=cache)
+            return self.strategy_function(df)
+
+        rows = pl.from_pandas(df, include_index=False).with_row_index(self.ROW_INDEX)
+        extracted_df = self.strategy_function(rows.lazy()).collect().to_pandas()
+        if self.ROW_INDEX in extracted_df.columns:
+            positions = extracted_df.pop(self.ROW_INDEX).to_numpy()
+            extracted_df.index = df.index[positions]
+        return extracted_df
+
     def _load_strategy_function(self):
-        module_path = f"./strategies/{self.strategy_name}.py"
-        spec = importlib.util.spec_from_file_location("strategy_module", module_path)
-        strategy_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(strategy_module)
+        strategy_module = self.load_strategy_module(self.strategy_name)
 
         if not hasattr(strategy_module, 'strategy'):
             self.logger.error("The strategy file does not contain a 'strategy' function.")
             raise AttributeError("Strategy function is missing in the specified file.")
+
+        # Strategies declare a non-default backend with a module-level BACKEND constant
+        self.backend = getattr(strategy_module, 'BACKEND', 'pandas')
+        if self.backend not in self.BACKENDS:
+            self.logger.error("Unsupported strategy backend: %s", self.backend)
+            raise ValueError(f"Unsupported strategy backend '{self.backend}': choose one of {self.BACKENDS}.")
+
+        # Optional input requirements, so only the needed columns and rows are read
+        self.columns = getattr(strategy_module, 'COLUMNS', None)
+        self.date_range = getattr(strategy_module, 'DATE_RANGE', None)
         
         return strategy_module.strategy
+
+    def _extract_features_polars(self):
+        """
+        Runs a strategy written as a lazy Polars query.
+
+        The strategy receives a LazyFrame scanning the parquet file and returns a LazyFrame.
+        Polars optimizes the whole query, so only the needed columns are read, and executes it
+        on all cores. The result is converted to pandas only once, for scaling and the model.
+
+        Returns:
+        - pd.DataFrame: Extracted features.
+        """
+        self.logger.info("Starting lazy Polars feature extraction with data file: %s", self.data_path)
+        query = self.strategy_function(pl.scan_parquet(self.data_path))
+        if not isinstance(query, pl.LazyFrame):
+            self.logger.error("Polars strategy did not return a LazyFrame.")
+            raise TypeError("Polars strategies must return a pl.LazyFrame.")
+
+        extracted = query.collect()
+        self.logger.info("Polars query collected: %d rows, %d columns", extracted.height, extracted.width)
+        extracted_df = extracted.to_pandas()
+        self.logger.info("Feature extraction completed for strategy: %s", self.strategy_name)
+        return extracted_df
+
+    @staticmethod
+    def load_strategy_module(strategy_name):
+        """
+        Imports a strategy file from the strategies directory.
+
+        Parameters:
+        - strategy_name (str): Name of the strategy file without extension.
+
+        Returns:
+        - module: Strategy module with its 'strategy' function and optional BACKEND, COLUMNS and DATE_RANGE.
+        """
+        module_path = f"./strategies/{strategy_name}.py"
+        spec = importlib.util.spec_from_file_location("strategy_module", module_path)
+        strategy_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(strategy_module)
+        return strategy_module
+
+    def _accepts_cache(self):
+        return 'cache' in inspect.signature(self.strategy_function).parameters
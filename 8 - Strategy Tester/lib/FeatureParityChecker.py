@@ -0,0 +1,123 @@
+import time
+import numpy as np
+import pandas as pd
+from lib.Logger import Logger
+from lib.FeatureExtractor import FeatureExtractor
+from lib.OnlineFeatureCache import OnlineFeatureCache
+from lib.TransactionReader import read_transactions
+
+
+class FeatureParityChecker:
+    def __init__(self, strategy_name, rtol=1e-6, atol=1e-9, expected_mismatches=None, datetime_col="Datetime"):
+        """
+        Initialize the FeatureParityChecker class.
+
+        Verifies that the online path (OnlineFeatureCache, one transaction at a time) computes
+        the same features as the batch strategy. A slice of transactions is run through the
+        strategy at once, then replayed event by event in time order through the online
+        path, and the two outputs are compared column by column. The time of every event is
+        recorded, so a faster online path can be checked for both speed and correctness.
+
+        Parameters:
+        - strategy_name (str): Name of a pandas strategy file accepting a cache.
+        - rtol (float): Relative tolerance of numeric columns.
+        - atol (float): Absolute tolerance of numeric columns.
+        - expected_mismatches (list, optional): Columns known to differ online, e.g. those a
+          strategy fills with statistics of the whole frame; reported but not failing.
+        - datetime_col (str): Column holding the transaction timestamp.
+        """
+        self.logger = Logger().get_logger(self.__class__.__name__)
+        self.strategy_name = strategy_name
+        self.feature_extractor = FeatureExtractor(strategy_name=strategy_name, data_path=None)
+        if self.feature_extractor.backend != 'pandas' or not self.feature_extractor._accepts_cache():
+            raise ValueError(f"Online features need a pandas strategy taking a cache; {strategy_name} does not.")
+        unsupported = OnlineFeatureCache.unsupported_calls(self.feature_extractor.strategy_function)
+        if unsupported:
+            raise ValueError(f"Online features cannot run {strategy_name}: it calls cache.{', cache.'.join(unsupported)}(), "
+                             "which has no online version.")
+        self.rtol = rtol
+        self.atol = atol
+        self.expected_mismatches = set(expected_mismatches or [])
+        self.datetime_col = datetime_col
+
+    def check(self, data, start=None, rows=10_000):
+        """
+        Compares the batch and online features of a slice of transactions.
+
+        Parameters:
+        - data (pd.DataFrame or str): Transactions, or the path of their parquet file.
+        - start (str, optional): First date of the slice (the earliest transaction if None).
+        - rows (int): Number of transactions replayed from start, in time order.
+
+        Returns:
+        - dict: Summary: events, columns, failing and expected mismatching columns, and the
+          p50/p95/p99/max latency per event in ms, with the p50 spent in the online state in µs.
+        - pd.DataFrame: One row per feature column with its mismatching rows, the largest
+          absolute difference of numeric columns and the first mismatching row label.
+        """
+        events = self._slice(data, start, rows)
+        batch = self.feature_extractor.extract_from(events)
+
+        cache = OnlineFeatureCache(datetime_col=self.datetime_col)
+        parts, latencies, state = [], np.empty(len(events)), np.empty(len(events))
+        for position in range(len(events)):
+            event_start, state_start = time.perf_counter(), cache.state_seconds
+            cache.next_batch(events.iloc[position:position + 1])
+            parts.append(self.feature_extractor.extract_from(cache.frame(), cache=cache))
+            latencies[position] = time.perf_counter() - event_start
+            state[position] = cache.state_seconds - state_start
+        online = pd.concat(parts).reindex(batch.index) if parts else batch.iloc[:0]
+
+        columns = pd.DataFrame([self._compare(col, batch, online) for col in batch.columns.union(online.columns, sort=False)],
+                               columns=['column', 'mismatches', 'max_abs_diff', 'first_mismatch', 'expected'])
+        columns['first_mismatch'] = columns['first_mismatch'].astype('Int64')
+        failing = columns['column'][(columns['mismatches'] > 0) & ~columns['expected']].tolist()
+        summary = {'strategy': self.strategy_name, 'events': len(events), 'columns': len(columns),
+                   'failing_columns': failing,
+                   'expected_mismatches': columns['column'][(columns['mismatches'] > 0) & columns['expected']].tolist()}
+        for q in (50, 95, 99):
+            summary[f'latency_p{q}_ms'] = float(np.percentile(latencies, q) * 1e3) if len(events) else np.nan
+        summary['latency_max_ms'] = float(latencies.max() * 1e3) if len(events) else np.nan
+        summary['state_p50_us'] = float(np.percentile(state, 50) * 1e6) if len(events) else np.nan
+
+        for row in columns[columns['mismatches'] > 0].itertuples():
+            (self.logger.info if row.expected else self.logger.warning)(
+                "%s column '%s': %d of %d rows differ online (max abs diff %s, first at row %s)",
+                self.strategy_name, row.column, row.mismatches, len(events), row.max_abs_diff, row.first_mismatch)
+        self.logger.info("Replayed %d events of %s: %d failing columns, latency p50 %.2f ms, p99 %.2f ms, state p50 %.0f µs",
+                         len(events), self.strategy_name, len(failing), summary['latency_p50_ms'],
+                         summary['latency_p99_ms'], summary['state_p50_us'])
+        return summary, columns
+
+    def _slice(self, data, start, rows):
+        """Returns `rows` transactions from `start` in time order, with a fresh unique index."""
+        if isinstance(data, str):
+            date_range = (start, None) if start is not None else None
+            data = read_transactions(data, self.feature_extractor.columns, date_range=date_range,
+                                     datetime_col=self.datetime_col)
+        data = data.assign(**{self.datetime_col: pd.to_datetime(data[self.datetime_col])})
+        if start is not None:
+            data = data[data[self.datetime_col] >= pd.Timestamp(start)]
+        return data.sort_values(self.datetime_col, kind='stable').head(rows).reset_index(drop=True)
+
+    def _compare(self, column, batch, online):
+        result = {'column': column, 'mismatches': len(batch), 'max_abs_diff': np.nan, 'first_mismatch': None,
+                  'expected': column in self.expected_mismatches}
+        if column not in batch.columns or column not in online.columns:
+            return result  # Produced by only one of the paths
+
+        expected, actual = batch[column], online[column]
+        if expected.dtype.kind in 'fiub' and actual.dtype.kind in 'fiub':
+            expected, actual = expected.to_numpy(dtype=np.float64), actual.to_numpy(dtype=np.float64)
+            equal = np.isclose(actual, expected, rtol=self.rtol, atol=self.atol, equal_nan=True)
+            with np.errstate(invalid='ignore'):  # inf - inf where both sides are infinite
+                difference = np.abs(actual - expected)[~equal]
+            difference = difference[~np.isnan(difference)]
+            result['max_abs_diff'] = float(difference.max()) if len(difference) else np.nan
+        else:
+            both_missing = (expected.isna() & actual.isna()).to_numpy()
+            equal = both_missing | (expected.astype(str) == actual.astype(str)).to_numpy()
+        result['mismatches'] = int((~equal).sum())
+        if result['mismatches']:
+            result['first_mismatch'] = batch.index[np.argmin(equal)]
+        return result
@@ -0,0 +1,146 @@
+import os
+import glob
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from lib.Logger import Logger
+
+
+class FeatureStore:
+    def __init__(self, store_dir="feature_store", max_bytes=20 * 1024 ** 3):
+        """
+        Initialize the FeatureStore class.
+
+        Frames are stored as Arrow IPC files named by a content hash of everything that
+        produced them, so a re-run with unchanged strategies and data loads them from disk
+        instead of recomputing. The least recently used files are evicted above max_bytes.
+
+        Parameters:
+        - store_dir (str): Directory holding the stored frames.
+        - max_bytes (int): Maximum total size of the stored frames.
+        """
+        self.logger = Logger().get_logger(self.__class__.__name__)
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        os.makedirs(store_dir, exist_ok=True)
+        self.logger.info("Feature store at %s (limit %.1f GB)", store_dir, max_bytes / 1024 ** 3)
+
+    def key(self, strategy_name, data_path, stage="features", extra=None):
+        """
+        Builds the key of a stored frame.
+
+        The key hashes the strategy source, the input file fingerprint (path, size and
+        modification time), the sources of the lib package with the pandas/pyarrow versions,
+        the pipeline stage and any extra settings such as the scaler.
+
+        Parameters:
+        - strategy_name (str): Name of the strategy file without extension.
+        - data_path (str): Path to the input parquet file.
+        - stage (str): Pipeline stage of the frame, e.g. 'features' or 'scaled'.
+        - extra (dict, optional): Additional settings the frame depends on.
+
+        Returns:
+        - str: Hex digest identifying the frame.
+        """
+        digest = hashlib.sha256()
+        with open(f"./strategies/{strategy_name}.py", "rb") as f:
+            digest.update(f.read())
+
+        stat = os.stat(data_path)
+        digest.update(f"{os.path.abspath(data_path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        digest.update(self._library_version().encode())
+        digest.update(json.dumps({"stage": stage, "extra": extra}, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def load(self, key):
+        """
+        Loads a stored frame, memory-mapping the Arrow file.
+
+        Parameters:
+        - key (str): Key built by key().
+
+        Returns:
+        - pd.DataFrame or None: Stored frame, or None if it is not in the store.
+        """
+        path = self._path(key)
+        try:
+            table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        except FileNotFoundError:
+            self.logger.info("Feature store miss: %s", key[:12])
+            return None
+
+        os.utime(path)  # Mark as recently used for eviction
+        self.logger.info("Feature store hit: %s (%d rows)", key[:12], table.num_rows)
+        return table.to_pandas(split_blocks=True)
+
+    def save(self, key, df):
+        """
+        Stores a frame and evicts the least recently used frames above the size limit.
+
+        The file is written under a temporary name and renamed, so concurrent workers never
+        read a partially written frame.
+
+        Parameters:
+        - key (str): Key built by key().
+        - df (pd.DataFrame): Frame to store.
+        """
+        if any(isinstance(dtype, pd.SparseDtype) for dtype in df.dtypes):
+            self.logger.info("Frame %s has sparse columns, which Arrow files cannot hold; not stored", key[:12])
+            return
+
+        path = self._path(key)
+        if os.path.exists(path):
+            os.utime(path)
+            return
+
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(temp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(temp_path, path)
+        self.logger.info("Stored frame %s (%.1f MB)", key[:12], os.path.getsize(path) / 1024 ** 2)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used frames until the store fits in max_bytes.
+
+        Parameters:
+        - keep (str, optional): Path that must not be removed, e.g. the frame just written.
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.store_dir, "*.arrow")):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue  # Removed by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except (FileNotFoundError, PermissionError):
+                continue  # Already removed, or still memory-mapped on Windows
+            total -= size
+            self.logger.info("Evicted %s (%.1f MB)", os.path.basename(path), size / 1024 ** 2)
+
+    def _path(self, key):
+        return os.path.join(self.store_dir, f"{key}.arrow")
+
+    @staticmethod
+    def _library_version():
+        # Any change to the lib sources or the dataframe libraries invalidates stored frames
+        digest = hashlib.sha256()
+        lib_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(lib_dir, "*.py"))):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        digest.update(f"{pd.__version__}:{pa.__version__}:{np.__version__}".encode())
+        return digest.hexdigest()
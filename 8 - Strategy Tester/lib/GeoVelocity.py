@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class GeoVelocity:
+    EARTH_RADIUS_KM = 6371.0088
+
+    def __init__(self, groups):
+        """
+        Initialize the GeoVelocity class.
+
+        Computes the distance, time delta and implied travel speed between consecutive
+        transactions of the same group on whole NumPy arrays. The first row of every group
+        has no previous transaction and is masked with NaN instead of using groupby.apply.
+
+        Parameters:
+        - groups (array-like): Group key of every row. Rows of the same group must be
+          contiguous and ordered in time (e.g. data sorted by ['User', 'Datetime']).
+        """
+        groups = np.asarray(groups)
+        self.size = len(groups)
+        self.first_in_group = np.ones(self.size, dtype=bool)
+        self.first_in_group[1:] = groups[1:] != groups[:-1]
+
+    def compute(self, latitude, longitude, timestamps=None, min_hours=1 / 60):
+        """
+        Computes consecutive-transaction features.
+
+        Parameters:
+        - latitude (array-like): Latitude in degrees.
+        - longitude (array-like): Longitude in degrees.
+        - timestamps (array-like, optional): Datetimes, required for the time delta and speed.
+        - min_hours (float): Lower bound of the time delta used for the speed, so transactions
+          in the same minute give a large but finite speed.
+
+        Returns:
+        - dict: 'distance_km' and, with timestamps, 'hours_since_previous' and 'speed_kmh' NumPy arrays.
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+
+        distance = np.full(self.size, np.nan)
+        if self.size > 1:
+            distance[1:] = self.haversine(latitude[:-1], longitude[:-1], latitude[1:], longitude[1:])
+        distance[self.first_in_group] = np.nan
+        results = {'distance_km': distance}
+
+        if timestamps is not None:
+            ticks = np.asarray(timestamps, dtype='datetime64[ns]')
+            hours = np.full(self.size, np.nan)
+            if self.size > 1:
+                hours[1:] = (ticks[1:] - ticks[:-1]) / np.timedelta64(1, 'h')
+            hours[self.first_in_group] = np.nan
+            results['hours_since_previous'] = hours
+            results['speed_kmh'] = distance / np.maximum(hours, min_hours)
+
+        return results
+
+    @classmethod
+    def haversine(cls, latitude_1, longitude_1, latitude_2, longitude_2):
+        """
+        Great-circle distance in kilometres between two arrays of coordinates in degrees.
+
+        Returns:
+        - np.ndarray: Distances in kilometres.
+        """
+        latitude_1, longitude_1, latitude_2, longitude_2 = map(np.radians, (latitude_1, longitude_1, latitude_2, longitude_2))
+        half_chord = (np.sin((latitude_2 - latitude_1) / 2) ** 2
+                      + np.cos(latitude_1) * np.cos(latitude_2) * np.sin((longitude_2 - longitude_1) / 2) ** 2)
+        return 2 * cls.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(half_chord, 0.0, 1.0)))
@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+
+class GroupedRolling:
+    STATS = ('count', 'sum', 'mean', 'std', 'var', 'min', 'max')
+
+    def __init__(self, groups):
+        """
+        Initialize the GroupedRolling class.
+
+        Computes row-based rolling statistics per group in a single vectorized pass, using
+        cumulative sums and group-boundary offsets instead of a Python function per group.
+
+        Parameters:
+        - groups (array-like): Group key of every row. Rows of the same group must be
+          contiguous and ordered in time (e.g. data sorted by ['User', 'Datetime']).
+        """
+        groups = np.asarray(groups)
+        self.size = len(groups)
+        boundaries = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+        self.offsets = np.concatenate(([0], boundaries, [self.size])) if self.size else np.zeros(1, dtype=np.int64)
+        self.lengths = np.diff(self.offsets)
+        self.row_start = np.repeat(self.offsets[:-1], self.lengths)
+        self.group_ids = np.repeat(np.arange(len(self.lengths)), self.lengths)
+
+    def compute(self, values, windows, stats=('count', 'mean', 'std'), min_periods=1):
+        """
+        Computes several rolling statistics for several window sizes in one call.
+
+        The results match `groupby(...).transform(lambda x: x.rolling(window, min_periods).<stat>())`,
+        with NaN values ignored and the sample standard deviation (ddof=1). As in pandas, a
+        window whose values are all equal has a variance of exactly 0 and its value as mean.
+
+        Parameters:
+        - values (array-like): Values aligned with the groups passed to the constructor.
+        - windows (list): Window sizes in rows.
+        - stats (list): Statistics to compute, any of GroupedRolling.STATS.
+        - min_periods (int): Minimum number of observations required for a value.
+
+        Returns:
+        - dict: Mapping of (stat, window) to a float64 NumPy array.
+        """
+        unknown = set(stats) - set(self.STATS)
+        if unknown:
+            raise ValueError(f"Unsupported rolling statistics: {sorted(unknown)}")
+
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        if len(values) != self.size:
+            raise ValueError("Values must have the same length as the groups.")
+
+        rows = np.arange(self.size)
+        valid = ~np.isnan(values)
+        count_cumsum = np.concatenate(([0], np.cumsum(valid)))
+
+        moments, run_length = None, None
+        if set(stats) & {'sum', 'mean', 'std', 'var'}:
+            moments = self._centered_cumsums(values, valid)
+            run_length, last_value = self._equal_runs(values, valid, count_cumsum)
+
+        results = {}
+        for window in windows:
+            start = np.maximum(rows - window + 1, self.row_start)
+            count = (count_cumsum[rows + 1] - count_cumsum[start]).astype(np.float64)
+            window_stats = {'count': count}
+
+            if moments is not None:
+                center, sum_cumsum, square_cumsum = moments
+                # Sums over [start, row] from the group-local prefix sums (0 before the group's first row)
+                has_before = start > self.row_start
+                shifted_sum = sum_cumsum[rows] - np.where(has_before, sum_cumsum[start - 1], 0.0)
+                shifted_square = square_cumsum[rows] - np.where(has_before, square_cumsum[start - 1], 0.0)
+                constant = run_length >= count  # Every value of the window equals the last one
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    window_stats['sum'] = shifted_sum + count * center
+                    window_stats['mean'] = np.where(constant, last_value, window_stats['sum'] / count)
+                    var = (shifted_square - shifted_sum ** 2 / count) / (count - 1)
+                var = np.where(count > 1, np.where(constant, 0.0, np.maximum(var, 0.0)), np.nan)
+                window_stats['var'] = var
+                window_stats['std'] = np.sqrt(var)
+
+            if 'min' in stats:
+                window_stats['min'] = self._extreme(values, start, np.fmin)
+            if 'max' in stats:
+                window_stats['max'] = self._extreme(values, start, np.fmax)
+
+            # pandas applies min_periods to the window length for counts and to valid values otherwise
+            too_few = count < max(min_periods, 1)
+            too_short = rows - start + 1 < min_periods
+            for stat in stats:
+                result = window_stats[stat]
+                result[too_short if stat == 'count' else too_few] = np.nan
+                results[(stat, window)] = result
+
+        return results
+
+    def _centered_cumsums(self, values, valid):
+        """
+        Builds cumulative sums of values centered on their group mean, restarting at every group.
+
+        The sums of a window are differences of these prefix sums, so their rounding error grows
+        with the magnitude of the prefix sums. Restarting at every group bounds it by the length
+        of the group instead of the total row count, and centering removes the group's offset.
+        The variance of a window much smaller than its group's variance still loses precision,
+        which is why windows of equal values are set to 0 from _equal_runs() instead.
+
+        Returns:
+        - tuple: Per-row center, and the group-local inclusive cumulative sum and sum of squares.
+        """
+        filled = np.where(valid, values, 0.0)
+        group_sum = np.add.reduceat(filled, self.offsets[:-1]) if self.size else np.zeros(0)
+        group_count = np.add.reduceat(valid, self.offsets[:-1]) if self.size else np.zeros(0)
+        group_mean = np.divide(group_sum, group_count, out=np.zeros_like(group_sum), where=group_count > 0)
+
+        center = np.repeat(group_mean, self.lengths)
+        shifted = np.where(valid, values - center, 0.0)
+        # Segmented cumulative sums, one run per group (compensated summation in pandas)
+        cumsums = pd.DataFrame({'sum': shifted, 'square': shifted ** 2}).groupby(self.group_ids, sort=False).cumsum()
+        return center, cumsums['sum'].to_numpy(), cumsums['square'].to_numpy()
+
+    def _equal_runs(self, values, valid, count_cumsum):
+        """
+        Counts, for every row, the consecutive equal values of its group ending at its last valid value.
+
+        A window is constant when this run is at least as long as its count of valid values,
+        the rule pandas uses to return a variance of exactly 0.
+
+        Returns:
+        - tuple: Run length per row (0 before the first valid value) and the last valid value per row.
+        """
+        positions = np.flatnonzero(valid)
+        if not len(positions):
+            return np.zeros(self.size), np.full(self.size, np.nan)
+        observed, groups = values[positions], self.group_ids[positions]
+        new_run = np.ones(len(positions), dtype=bool)
+        new_run[1:] = (observed[1:] != observed[:-1]) | (groups[1:] != groups[:-1])
+        index = np.arange(len(positions))
+        run_length = index - np.maximum.accumulate(np.where(new_run, index, 0)) + 1
+
+        last = count_cumsum[1:] - 1  # Position among the valid values of the last one up to every row
+        has_last = last >= 0
+        last = np.maximum(last, 0)
+        return np.where(has_last, run_length[last], 0), np.where(has_last, observed[last], np.nan)
+
+    def _extreme(self, values, start, reducer):
+        """
+        Computes a rolling min or max with a doubling table over window lengths.
+
+        Each window [start, row] is covered by two overlapping power-of-two blocks that
+        lie within the group, so the work is O(n log window) with O(n) extra memory.
+
+        Parameters:
+        - values (np.ndarray): Values to reduce.
+        - start (np.ndarray): First row of every window.
+        - reducer (np.ufunc): np.fmin or np.fmax, which skip NaN values.
+
+        Returns:
+        - np.ndarray: Rolling extreme per row.
+        """
+        rows = np.arange(self.size)
+        length = rows - start + 1
+        result = np.full(self.size, np.nan)
+        if not self.size:
+            return result
+
+        level = np.floor(np.log2(length)).astype(np.int64)
+        table = values.copy()
+        span, k = 1, 0
+        while True:
+            selected = np.flatnonzero(level == k)
+            if len(selected):
+                result[selected] = reducer(table[selected], table[start[selected] + span - 1])
+            if span * 2 > length.max():
+                break
+            # table[j] now covers values[j - 2 * span + 1 : j + 1]
+            table[span:] = reducer(table[span:], table[:-span])
+            span, k = span * 2, k + 1
+
+        return result
@@ -1,10 +1,11 @@
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
 
 class Logger:
     _instance = None  # Class variable to store the singleton instance
     _test_name = None  # Class variable to store the test name
+    _queue = None  # Class variable to store the queue used by worker processes
 
     def __new__(cls, test_name=None):
         """
@@ -56,7 +57,10 @@ class Logger:
         logger.setLevel(logging.INFO)
 
         # Check if handlers already exist to avoid duplicate logs
-        if not logger.handlers:
+        if not logger.handlers and Logger._queue is not None:
+            # Worker processes forward records to the main process instead of writing the log file
+            logger.addHandler(QueueHandler(Logger._queue))
+        elif not logger.handlers:
             file_handler = RotatingFileHandler(self.log_file_path, maxBytes=10**6, backupCount=5)
             stream_handler = logging.StreamHandler()
             formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
@@ -68,3 +72,37 @@ class Logger:
             logger.addHandler(stream_handler)
 
         return logger
+
+    def listen(self, queue):
+        """
+        Starts writing records sent by worker processes through the queue to this test's log.
+
+        Parameters:
+        - queue (multiprocessing.Queue): Queue shared with the worker processes.
+
+        Returns:
+        - listener (logging.handlers.QueueListener): Started listener, stop it once the workers are done.
+        """
+        listener = QueueListener(queue, _ForwardHandler(self))
+        listener.start()
+        return listener
+
+    @classmethod
+    def use_queue(cls, queue):
+        """
+        Makes every logger created in this process forward its records to the queue.
+
+        Parameters:
+        - queue (multiprocessing.Queue): Queue read by the listener of the main process.
+        """
+        cls._queue = queue
+
+
+class _ForwardHandler(logging.Handler):
+    def __init__(self, logger):
+        super().__init__()
+        self.logger = logger
+
+    def emit(self, record):
+        # Dispatch to the logger of the same name, so records keep their usual handlers
+        self.logger.get_logger(record.name).handle(record)
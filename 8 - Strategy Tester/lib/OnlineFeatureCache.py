@@ -0,0 +1,373 @@
+import re
+import math
+import time
+import inspect
+import logging
+from collections import deque
+import numpy as np
+import pandas as pd
+from lib.FeatureCache import FeatureCache
+from lib.GroupedRolling import GroupedRolling
+from lib.TimeWindowVelocity import TimeWindowVelocity
+from lib.GeoVelocity import GeoVelocity
+
+
+class OnlineFeatureCache(FeatureCache):
+    def __init__(self, group_col='User', datetime_col='Datetime'):
+        """
+        Initialize the OnlineFeatureCache class.
+
+        A FeatureCache for transactions arriving one (or a few) at a time. Instead of sorting
+        the whole history it keeps compact incremental state per group: the last timestamp,
+        location and column values, a ring buffer of the last values for row-based rolling
+        windows, and the recent events with a running count and sum per time window. Each
+        transaction updates the state in O(1) (amortized for time windows, O(window) for the
+        row-based statistics), and the features equal those FeatureCache computes over the
+        whole history in time order.
+
+        Strategies run unchanged on this cache: pass the new transactions, in time order, to
+        next_batch() and then run the strategy with the cache. Every primitive call (column,
+        rolling, velocity, geo, previous) keeps its own state, created on first use, so every
+        batch must go through the same strategy. Events older than the last transaction of
+        their group are rejected, and rollback() undoes the state updates of the last batch,
+        e.g. when the model rejects it after the features were computed.
+
+        Parameters:
+        - group_col (str): Column identifying the entity whose history is tracked.
+        - datetime_col (str): Column holding the transaction timestamp.
+        """
+        super().__init__(data=pd.DataFrame(), group_col=group_col, datetime_col=datetime_col)
+        self.logger.setLevel(logging.WARNING)  # A line per batch and feature would dominate the latency
+        self._state = {}
+        self._last_ticks = {}
+        self._undo = []
+        self._batch = {}
+        self._lists = {}
+        self._ticks = None
+        self.state_seconds = 0.0
+
+    def next_batch(self, df):
+        """
+        Sets the transactions the next strategy run computes features for.
+
+        Parameters:
+        - df (pd.DataFrame): New transactions, in time order within each group and not older
+          than the last transaction of their group.
+        """
+        self._undo = []  # The previous batch is final once the next one arrives
+        if not pd.api.types.is_datetime64_any_dtype(df[self.datetime_col]):
+            df = df.assign(**{self.datetime_col: pd.to_datetime(df[self.datetime_col], errors='coerce')})
+        if df[self.datetime_col].isna().any():
+            raise ValueError(f"Online features need the '{self.datetime_col}' of every transaction.")
+        ticks = df[self.datetime_col].to_numpy(dtype='datetime64[ns]').view(np.int64).tolist()
+        last_ticks = {}
+        for group, tick in zip(df[self.group_col].tolist(), ticks):
+            last = last_ticks.get(group, self._last_ticks.get(group))
+            if last is not None and tick < last:
+                raise ValueError(f"Transaction of {self.group_col} {group} at {pd.Timestamp(tick)} is older than its "
+                                 f"previous one at {pd.Timestamp(last)}; online features need events in time order.")
+            last_ticks[group] = tick
+
+        self._undo.append((self._last_ticks, {group: self._last_ticks.get(group, _MISSING) for group in last_ticks}))
+        self._last_ticks.update(last_ticks)
+        self._frame = df
+        self._columns, self._lookups, self._batch, self._lists = {}, {}, {}, {}
+        self._ticks = ticks
+
+    def rollback(self):
+        """
+        Undoes the state updates of the last batch, e.g. after scoring it failed, so the next
+        transactions of its groups see the state as it was before it.
+        """
+        for state, previous in reversed(self._undo):
+            for group, value in previous.items():
+                if value is _MISSING:
+                    state.pop(group, None)
+                else:
+                    state[group] = value
+        self._undo = []
+        self._batch, self._lists = {}, {}
+
+    # Primitives needing the whole history of a group, which the incremental state does not keep
+    UNSUPPORTED = ('grouped',)
+
+    @classmethod
+    def unsupported_calls(cls, strategy_function):
+        """
+        Finds the primitives a strategy calls that have no online version.
+
+        The source of the strategy file is searched, so helpers the strategy calls are
+        covered as well and the strategy is rejected before any transaction is scored.
+
+        Parameters:
+        - strategy_function (callable): Strategy function of a pandas strategy file.
+
+        Returns:
+        - list: Names of the unsupported primitives called, e.g. ['grouped'].
+        """
+        source = inspect.getsource(inspect.getmodule(strategy_function) or strategy_function)
+        return [name for name in cls.UNSUPPORTED if re.search(rf"\.\s*{name}\s*\(", source)]
+
+    def grouped(self, column):
+        raise ValueError(f"OnlineFeatureCache does not support grouped('{column}'): a grouped column needs the "
+                         "whole history of every group. Use rolling(), previous() or a derived column instead.")
+
+    def rolling(self, column, windows, stats=('count', 'mean', 'std'), min_periods=1):
+        """
+        Returns row-based rolling statistics of a column within each group, from a ring buffer
+        of the last max(windows) values of every group.
+
+        Parameters:
+        - column (str): Column to aggregate.
+        - windows (list): Window sizes in rows.
+        - stats (list): Statistics to compute, any of GroupedRolling.STATS.
+        - min_periods (int): Minimum number of observations required for a value.
+
+        Returns:
+        - dict: Mapping of (stat, window) to a pd.Series aligned with the batch.
+        """
+        unknown = set(stats) - set(GroupedRolling.STATS)
+        if unknown:
+            raise ValueError(f"Unsupported rolling statistics: {sorted(unknown)}")
+        windows, stats = list(windows), list(stats)
+
+        def compute(buffers):
+            results = {(stat, window): [] for stat in stats for window in windows}
+            for group, value in zip(self._keys((self.group_col,)), self._values(column)):
+                buffer = buffers.get(group)
+                if buffer is None:
+                    buffer = buffers[group] = deque(maxlen=max(windows))
+                buffer.append(value)
+                recent = list(buffer)
+                for window in windows:
+                    for stat, result in self._window_stats(recent[-window:], stats, min_periods).items():
+                        results[(stat, window)].append(result)
+            return results
+
+        return self._incremental(('rolling', column, tuple(windows), tuple(stats), min_periods), compute,
+                                 (self.group_col,))
+
+    def velocity(self, group_cols, windows=('1h', '24h', '7D', '30D'), column='Amount', stats=('count', 'sum')):
+        """
+        Returns time-based rolling counts and sums within each group, from the recent events of
+        every group and a running count and sum per window.
+
+        Parameters:
+        - group_cols (str or list): Columns identifying the group, e.g. 'User' or ['User', 'Card'].
+        - windows (list): Window lengths as pandas offset strings, e.g. '1h', '24h', '7D'.
+        - column (str): Column to sum.
+        - stats (list): Statistics to compute, any of TimeWindowVelocity.STATS.
+
+        Returns:
+        - dict: Mapping of (stat, window) to a pd.Series aligned with the batch.
+        """
+        unknown = set(stats) - set(TimeWindowVelocity.STATS)
+        if unknown:
+            raise ValueError(f"Unsupported velocity statistics: {sorted(unknown)}")
+        group_cols = tuple([group_cols] if isinstance(group_cols, str) else group_cols)
+        windows, stats = list(windows), list(stats)
+        # Whole seconds, the resolution of TimeWindowVelocity
+        spans = [pd.Timedelta(window).value // 10 ** 9 for window in windows]
+
+        def compute(groups):
+            results = {(stat, window): [] for stat in stats for window in windows}
+            for group, tick, value in zip(self._keys(group_cols), self._ticks, self._values(column)):
+                state = groups.get(group)
+                if state is None:
+                    state = groups[group] = _TimeWindows(spans)
+                state.add(tick // 10 ** 9, value)
+                for index, window in enumerate(windows):
+                    window_sum = state.sums[index] if state.valid[index] else np.nan
+                    window_stats = {'count': float(state.counts[index]), 'sum': window_sum,
+                                    'mean': window_sum / state.valid[index] if state.valid[index] else np.nan}
+                    for stat in stats:
+                        results[(stat, window)].append(window_stats[stat])
+            return results
+
+        return self._incremental(('velocity', group_cols, column, tuple(windows), tuple(stats)), compute, group_cols)
+
+    def geo(self, group_cols=None, latitude_col='Latitude', longitude_col='Longitude'):
+        """
+        Returns the haversine distance, time delta and implied travel speed since the previous
+        transaction of the same group, from the last location and timestamp of every group.
+
+        Parameters:
+        - group_cols (str or list, optional): Columns identifying the group (the group column by default).
+        - latitude_col (str): Latitude column in degrees.
+        - longitude_col (str): Longitude column in degrees.
+
+        Returns:
+        - dict: 'distance_km', 'hours_since_previous' and 'speed_kmh' pd.Series aligned with the batch,
+          NaN for the first transaction of each group.
+        """
+        group_cols = tuple([group_cols or self.group_col] if isinstance(group_cols, (str, type(None))) else group_cols)
+
+        def compute(last):
+            distance, hours, speed = [], [], []
+            rows = zip(self._keys(group_cols), self._values(latitude_col), self._values(longitude_col), self._ticks)
+            for group, latitude, longitude, tick in rows:
+                previous = last.get(group)
+                kilometres = elapsed = np.nan
+                if previous is not None:
+                    kilometres = self._haversine(previous[0], previous[1], latitude, longitude)
+                    elapsed = (tick - previous[2]) / 3.6e12
+                distance.append(kilometres)
+                hours.append(elapsed)
+                speed.append(kilometres / max(elapsed, 1 / 60) if previous is not None else np.nan)  # GeoVelocity's min_hours
+                last[group] = (latitude, longitude, tick)
+            return {'distance_km': distance, 'hours_since_previous': hours, 'speed_kmh': speed}
+
+        return self._incremental(('geo', group_cols, latitude_col, longitude_col), compute, group_cols)
+
+    def previous(self, column, group_cols=None):
+        """
+        Returns the value of a column at the previous transaction of the same group, from the
+        last value of every group.
+
+        Parameters:
+        - column (str): Column of the batch.
+        - group_cols (str or list, optional): Columns identifying the group (the group column by default).
+
+        Returns:
+        - pd.Series: Previous values aligned with the batch, NaN for the first transaction of each group.
+        """
+        group_cols = tuple([group_cols or self.group_col] if isinstance(group_cols, (str, type(None))) else group_cols)
+
+        def compute(last):
+            values = []
+            for group, value in zip(self._keys(group_cols), self._frame[column].tolist()):
+                values.append(last.get(group, np.nan))
+                last[group] = value
+            return values
+
+        return self._incremental(('previous', group_cols, column), compute, group_cols)
+
+    def _incremental(self, key, compute, group_cols):
+        """
+        Runs a primitive call once per batch: compute(state) advances its state over the batch
+        and returns a list (or a dict of lists) of feature values, returned as Series.
+
+        The state of the batch's groups (keyed by group_cols) is copied first, for rollback().
+        Only this and compute() are counted in state_seconds, the cost of the incremental
+        features themselves; wrapping the values into Series is the strategy's pandas work.
+        """
+        if key not in self._batch:
+            state = self._state.setdefault(key, {})
+            start = time.perf_counter()
+            previous = {}
+            for group in self._keys(group_cols):
+                if group not in previous:
+                    value = state.get(group, _MISSING)
+                    previous[group] = value.copy() if isinstance(value, (deque, _TimeWindows)) else value
+            self._undo.append((state, previous))
+            values = compute(state)
+            self.state_seconds += time.perf_counter() - start
+            index = self._frame.index
+            self._batch[key] = ({name: pd.Series(column, index=index) for name, column in values.items()}
+                                if isinstance(values, dict) else pd.Series(values, index=index))
+        return self._batch[key]
+
+    def _keys(self, group_cols):
+        if ('keys', group_cols) not in self._lists:
+            columns = [self._frame[col].tolist() for col in group_cols]
+            self._lists[('keys', group_cols)] = columns[0] if len(columns) == 1 else list(zip(*columns))
+        return self._lists[('keys', group_cols)]
+
+    def _values(self, column):
+        if ('values', column) not in self._lists:
+            self._lists[('values', column)] = self._frame[column].to_numpy(dtype=np.float64).tolist()
+        return self._lists[('values', column)]
+
+    @staticmethod
+    def _window_stats(values, stats, min_periods):
+        """Statistics of one row-based window, with the conventions of GroupedRolling."""
+        valid = [value for value in values if value == value]
+        count = len(valid)
+        enough = count >= max(min_periods, 1)
+        total = sum(valid)
+        mean = total / count if count else np.nan
+        var = max(sum((value - mean) ** 2 for value in valid) / (count - 1), 0.0) if count > 1 else np.nan
+        if count and min(valid) == max(valid):
+            mean, var = valid[-1], 0.0 if count > 1 else np.nan  # Equal values, exact as in GroupedRolling
+        window_stats = {
+            'count': float(count) if len(values) >= min_periods else np.nan,
+            'sum': total, 'mean': mean, 'var': var, 'std': math.sqrt(var) if count > 1 else np.nan,
+            'min': min(valid) if valid else np.nan, 'max': max(valid) if valid else np.nan,
+        }
+        return {stat: window_stats[stat] if stat == 'count' or enough else np.nan for stat in stats}
+
+    @staticmethod
+    def _haversine(latitude_1, longitude_1, latitude_2, longitude_2):
+        """GeoVelocity.haversine for two scalar coordinates, without NumPy's per-call overhead."""
+        latitude_1, longitude_1, latitude_2, longitude_2 = map(math.radians, (latitude_1, longitude_1, latitude_2, longitude_2))
+        half_chord = (math.sin((latitude_2 - latitude_1) / 2) ** 2
+                      + math.cos(latitude_1) * math.cos(latitude_2) * math.sin((longitude_2 - longitude_1) / 2) ** 2)
+        return 2 * GeoVelocity.EARTH_RADIUS_KM * math.asin(math.sqrt(min(max(half_chord, 0.0), 1.0)))
+
+    def _load(self):
+        raise ValueError("OnlineFeatureCache has no data of its own; pass the transactions to next_batch().")
+
+    def _time_since_last_transaction(self, df):
+        def compute(last):
+            minutes = []
+            for group, tick in zip(self._keys((self.group_col,)), self._ticks):
+                previous = last.get(group)
+                minutes.append(np.nan if previous is None else (tick - previous) / 1e9 / 60)
+                last[group] = tick
+            return minutes
+
+        return self._incremental(('TimeSinceLastTransaction',), compute, (self.group_col,))
+
+    DERIVED_COLUMNS = {**FeatureCache.DERIVED_COLUMNS, 'TimeSinceLastTransaction': _time_since_last_transaction}
+
+
+_MISSING = object()  # State of a group without any transaction yet
+
+
+class _TimeWindows:
+    """Recent events of one group with a running count and sum per time window."""
+    __slots__ = ('spans', 'ticks', 'values', 'heads', 'counts', 'sums', 'valid')
+
+    def __init__(self, spans):
+        self.spans = spans
+        self.ticks, self.values = [], []
+        self.heads = [0] * len(spans)
+        self.counts = [0] * len(spans)
+        self.sums = [0.0] * len(spans)
+        self.valid = [0] * len(spans)
+
+    def copy(self):
+        windows = _TimeWindows.__new__(_TimeWindows)
+        windows.spans = self.spans
+        windows.ticks, windows.values = self.ticks.copy(), self.values.copy()
+        windows.heads, windows.counts = self.heads.copy(), self.counts.copy()
+        windows.sums, windows.valid = self.sums.copy(), self.valid.copy()
+        return windows
+
+    def add(self, tick, value):
+        """Adds an event and expires, per window, the events at or before tick - span."""
+        self.ticks.append(tick)
+        self.values.append(value)
+        is_valid = value == value
+        for index, span in enumerate(self.spans):
+            self.counts[index] += 1
+            if is_valid:
+                self.sums[index] += value
+                self.valid[index] += 1
+            head = self.heads[index]
+            while self.ticks[head] <= tick - span:
+                expired = self.values[head]
+                self.counts[index] -= 1
+                if expired == expired:
+                    self.sums[index] -= expired
+                    self.valid[index] -= 1
+                head += 1
+            self.heads[index] = head
+            if not self.valid[index]:
+                self.sums[index] = 0.0  # Drop the rounding residue of an emptied window
+
+        # Forget the events that left every window once they are the larger part of the buffer
+        expired = min(self.heads)
+        if expired > 64 and expired * 2 > len(self.ticks):
+            del self.ticks[:expired], self.values[:expired]
+            self.heads = [head - expired for head in self.heads]
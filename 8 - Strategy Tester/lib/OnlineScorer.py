@@ -0,0 +1,158 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pandas as pd
+from lib.BatchScorer import BatchScorer
+from lib.DtypeOptimizer import DtypeOptimizer
+from lib.OnlineFeatureCache import OnlineFeatureCache
+from lib.TransactionReader import read_transactions
+
+
+class OnlineScorer(BatchScorer):
+    def __init__(self, strategy_name, scale_encode, model, target_col="Is Fraud", datetime_col="Datetime",
+                 compact_dtypes=True):
+        """
+        Initialize the OnlineScorer class.
+
+        Scores transactions as they arrive. The strategy runs on each new transaction with an
+        OnlineFeatureCache, which keeps the per-User and per-Card state its history features
+        need, so a transaction is scored without reading or sorting past transactions. Load the
+        state from past transactions with warm_up() first, then score events in time order
+        with score_events() or over HTTP with serve().
+
+        Parameters:
+        - strategy_name (str): Name of a pandas strategy file accepting a cache.
+        - scale_encode (ScaleEncode): Fitted ScaleEncode.
+        - model (useModel): Trained model.
+        - target_col (str): Target column, excluded from the model input.
+        - datetime_col (str): Datetime column, excluded from the model input.
+        - compact_dtypes (bool): Compact the extracted features as in training.
+        """
+        super().__init__(strategy_name, scale_encode, model, target_col=target_col, datetime_col=datetime_col,
+                         compact_dtypes=compact_dtypes)
+        if self.feature_extractor.backend != 'pandas' or not self.feature_extractor._accepts_cache():
+            raise ValueError(f"Online scoring needs a pandas strategy taking a cache; {strategy_name} does not.")
+        unsupported = OnlineFeatureCache.unsupported_calls(self.feature_extractor.strategy_function)
+        if unsupported:
+            raise ValueError(f"Online scoring cannot run {strategy_name}: it calls cache.{', cache.'.join(unsupported)}(), "
+                             "which has no online version.")
+        self.cache = OnlineFeatureCache(datetime_col=datetime_col)
+        self.dtype_optimizer = DtypeOptimizer(verbose=False) if compact_dtypes else None
+        self.lock = threading.Lock()  # The per-group state is updated by one event at a time
+
+    def warm_up(self, history, batch_size=100_000):
+        """
+        Loads the per-group state from past transactions without scoring them.
+
+        The transactions are put in time order and run through the strategy in batches, so
+        the pandas work of the strategy is shared by many rows.
+
+        Parameters:
+        - history (pd.DataFrame or str): Past transactions, or the path of their parquet file.
+        - batch_size (int): Number of transactions per strategy run.
+
+        Returns:
+        - int: Number of transactions loaded.
+        """
+        start = time.perf_counter()
+        if isinstance(history, str):
+            history = read_transactions(history, self.feature_extractor.columns, datetime_col=self.datetime_col)
+        if self.target_col not in history.columns:
+            history = history.assign(**{self.target_col: 0})
+        history = history.assign(**{self.datetime_col: pd.to_datetime(history[self.datetime_col])})
+        history = history.sort_values(self.datetime_col, kind='stable')
+
+        with self.lock:
+            for offset in range(0, len(history), batch_size):
+                self._extract_features(history.iloc[offset:offset + batch_size])
+        self.logger.info("Warmed up the online state of %s with %d transactions in %.1f s",
+                         self.strategy_name, len(history), time.perf_counter() - start)
+        return len(history)
+
+    def score_events(self, events):
+        """
+        Scores one or more new transactions, in the order given, and adds them to the state.
+
+        Events older than the last transaction of their user are rejected with a ValueError.
+        When scoring fails, none of the events is added to the state.
+
+        Parameters:
+        - events (dict or list): Transaction as a mapping of column to value, or a list of them.
+
+        Returns:
+        - dict: 'fraud_probability' (list, one per event), 'feature_state_us' (time spent in
+          the incremental state) and 'latency_ms' (total scoring time).
+        """
+        events = [events] if isinstance(events, dict) else list(events)
+        with self.lock:
+            start, state_seconds = time.perf_counter(), self.cache.state_seconds
+            try:
+                probabilities = self.score(pd.DataFrame(events))
+            except Exception:
+                self.cache.rollback()  # A rejected event must not become the previous transaction of its user
+                raise
+            state_seconds = self.cache.state_seconds - state_seconds
+            latency = time.perf_counter() - start
+        return {'fraud_probability': probabilities.tolist(), 'feature_state_us': state_seconds * 1e6,
+                'latency_ms': latency * 1e3}
+
+    def make_server(self, host="127.0.0.1", port=8080):
+        """
+        Creates a local HTTP server scoring the JSON events POSTed to /score.
+
+        The body is one transaction object or a list of them; the response is the dict
+        returned by score_events(), or {"error": ...} with status 400 for invalid events.
+
+        Parameters:
+        - host (str): Address to listen on.
+        - port (int): Port to listen on (0 picks a free one).
+
+        Returns:
+        - ThreadingHTTPServer: Server to run with serve_forever().
+        """
+        scorer = self
+
+        class ScoreHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/score":
+                    self.send_error(404)
+                    return
+                try:
+                    events = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    status, response = 200, scorer.score_events(events)
+                except (ValueError, KeyError, TypeError) as error:
+                    status, response = 400, {"error": str(error)}
+                body = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Requests are not logged, a line per event would dominate the latency
+
+        server = ThreadingHTTPServer((host, port), ScoreHandler)
+        self.logger.info("Scoring %s on http://%s:%d/score", self.strategy_name, *server.server_address[:2])
+        return server
+
+    def serve(self, host="127.0.0.1", port=8080):
+        """
+        Serves score requests over HTTP until interrupted, see make_server().
+
+        Parameters:
+        - host (str): Address to listen on.
+        - port (int): Port to listen on.
+        """
+        server = self.make_server(host, port)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    def _extract_features(self, df):
+        self.cache.next_batch(df)
+        return self.feature_extractor.extract_from(self.cache.frame(), cache=self.cache)
@@ -0,0 +1,79 @@
+import os
+import inspect
+import pandas as pd
+import pyarrow.dataset as ds
+import xgboost as xgb
+from lib.TransactionReader import date_filter
+
+
+class ParquetBatchIter(xgb.DataIter):
+    def __init__(self, data_path, target_col, feature_names=None, weight_col=None, date_range=None,
+                 datetime_col="Datetime", batch_size=500_000, categories=None, cache_dir=None):
+        """
+        Initialize the ParquetBatchIter class.
+
+        Feeds a scaled and encoded parquet file (e.g. written by ScaleEncode.transform_stream) to
+        XGBoost one record batch at a time, so a QuantileDMatrix is built from the batches
+        without the whole file as a DataFrame in memory. Only the feature, target and weight
+        columns are read, and the date range is pushed down as a dataset filter. With
+        cache_dir, XGBoost keeps the quantized pages on local disk (external memory).
+
+        Parameters:
+        - data_path (str): Parquet file of scaled and encoded features.
+        - target_col (str): Target column.
+        - feature_names (list, optional): Feature columns (all but target, datetime and weight if not provided).
+        - weight_col (str, optional): Column of sample weights.
+        - date_range (tuple, optional): (start, end) dates of the rows to read, start inclusive and end exclusive.
+        - datetime_col (str): Column the date range applies to, excluded from the features.
+        - batch_size (int): Number of rows per batch.
+        - categories (dict, optional): Categories of every native categorical column, e.g. the
+          vocabularies of a fitted ScaleEncode, so every batch uses the same category codes.
+        - cache_dir (str, optional): Directory of the external-memory cache (None keeps the matrix in memory).
+        """
+        self.dataset = ds.dataset(data_path, format='parquet')
+        available = self.dataset.schema.names
+        excluded = {target_col, datetime_col, weight_col}
+        self.feature_names = list(feature_names) if feature_names is not None \
+            else [col for col in available if col not in excluded]
+        missing = [col for col in self.feature_names + [target_col] + ([weight_col] if weight_col else [])
+                   if col not in available]
+        if missing:
+            raise ValueError(f"Columns missing from {data_path}: {missing}")
+
+        self.target_col = target_col
+        self.weight_col = weight_col
+        self.filter = date_filter(datetime_col, date_range)
+        self.batch_size = batch_size
+        self.categories = categories or {}
+        self.cache_dir = cache_dir
+        self.rows = 0
+        self._batches = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        # on_host (XGBoost 3.0+) would keep the external-memory pages in host memory instead of the cache directory
+        options = {'on_host': False} if 'on_host' in inspect.signature(xgb.DataIter.__init__).parameters else {}
+        super().__init__(cache_prefix=os.path.join(cache_dir, "xgb") if cache_dir else None, **options)
+
+    def reset(self):
+        """Restarts from the first batch; XGBoost calls it after every pass over the data."""
+        self._batches = None
+
+    def next(self, input_data):
+        """Passes the next non-empty batch to XGBoost, returning False after the last one."""
+        if self._batches is None:
+            columns = self.feature_names + [self.target_col] + ([self.weight_col] if self.weight_col else [])
+            self._batches = iter(self.dataset.to_batches(columns=columns, filter=self.filter, batch_size=self.batch_size))
+            self.rows = 0
+
+        for batch in self._batches:
+            if batch.num_rows == 0:
+                continue  # Row groups outside the date range give empty batches
+            df = batch.to_pandas()
+            for col, categories in self.categories.items():
+                if col in df.columns:
+                    df[col] = pd.Categorical(df[col], categories=categories)
+            input_data(data=df[self.feature_names], label=df[self.target_col],
+                       weight=df[self.weight_col] if self.weight_col else None)
+            self.rows += len(df)
+            return True
+        return False
@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
 from lib.Logger import Logger
-from imblearn.over_sampling import SMOTE
+from lib.Resampler import Resampler
 
 
 class Preprocessor:
@@ -15,6 +16,10 @@ class Preprocessor:
         """
         Splits data into training and testing sets based on a specified date.
 
+        When the training rows precede the test rows (rows sorted by date, or a training frame
+        followed by a test frame) the sets are contiguous slices of X and y, found with a binary
+        search, instead of masked copies. y is aligned with X by position.
+
         Parameters:
         - X (pd.DataFrame): Feature DataFrame containing a datetime column.
         - y (pd.Series): Target Series aligned with X.
@@ -37,46 +42,146 @@ class Preprocessor:
                 self.logger.error("No datetime column provided or found in DataFrame.")
                 raise ValueError("Datetime column not provided and could not be auto-detected.")
 
-        # Ensure the datetime column is in datetime format
-        X = X.copy()
-        X[datetime_col] = pd.to_datetime(X[datetime_col], errors='coerce')
-        if X[datetime_col].isnull().all():
+        # Parse the datetime column only if it is not a datetime already
+        datetimes = X[datetime_col]
+        if not pd.api.types.is_datetime64_any_dtype(datetimes):
+            datetimes = pd.to_datetime(datetimes, errors='coerce')
+        if datetimes.isnull().all():
             self.logger.error("Datetime column could not be parsed as dates.")
             raise ValueError("Provided datetime column could not be parsed as dates.")
 
-        # Split the data based on the split_date
-        train_data = X[X[datetime_col] < split_date]
-        test_data = X[X[datetime_col] >= split_date]
-
-        # Drop the datetime column after splitting
-        X_train = train_data.drop(columns=[datetime_col])
-        X_test = test_data.drop(columns=[datetime_col])
-
-        # Align target variable (y) with the indices of train and test sets
-        y_train = y[train_data.index]
-        y_test = y[test_data.index]
+        # Split the data based on the split_date, dropping the datetime column
+        features = X.drop(columns=[datetime_col])
+        cut = self._contiguous_cut(datetimes, split_date)
+        if cut is not None:
+            # Train rows precede test rows: slice contiguous views instead of copying through masks
+            X_train, X_test = features.iloc[:cut], features.iloc[cut:]
+            y_train, y_test = y.iloc[:cut], y.iloc[cut:]
+        else:
+            is_train = (datetimes < split_date).to_numpy()
+            is_test = (datetimes >= split_date).to_numpy()
+            X_train, X_test = features[is_train], features[is_test]
+            y_train, y_test = y[is_train], y[is_test]
 
         # Log the results of the split
         self.logger.info("Data split complete: %d training samples, %d test samples.", len(X_train), len(X_test))
 
         # SMOTE alg
         if smote:
-            self.logger.info("Applying SMOTE to address class imbalance.")
-            smote = SMOTE(sampling_strategy=sampling_strategy, random_state=42)
-            
-            # Log the class distribution before applying SMOTE
-            class_counts_before = y_train.value_counts().to_dict()
-            self.logger.info(f"Class distribution before SMOTE: {class_counts_before}")
-            
-            # Apply SMOTE
-            X_train, y_train = smote.fit_resample(X_train, y_train)
-            
-            # Log the class distribution after applying SMOTE
-            class_counts_after = y_train.value_counts().to_dict()
-            self.logger.info(f"Class distribution after SMOTE: {class_counts_after}")
+            X_train, y_train = self.apply_smote(X_train, y_train, sampling_strategy)
         
         return X_train, X_test, y_train, y_test
 
+    def apply_smote(self, X_train, y_train, sampling_strategy=0.5):
+        """
+        Oversamples the minority class of the training set with SMOTE.
+
+        Parameters:
+        - X_train (pd.DataFrame): Training feature set.
+        - y_train (pd.Series): Training target set.
+        - sampling_strategy (float): Ratio of minority to majority samples after resampling.
+
+        Returns:
+        - X_train (pd.DataFrame): Resampled training feature set.
+        - y_train (pd.Series): Resampled training target set.
+        """
+        X_train, y_train, _ = self.resample(X_train, y_train, 'smote', sampling_strategy)
+        return X_train, y_train
+
+    def resample(self, X_train, y_train, method='smote', sampling_strategy=0.5, subsample=0.1, measure_memory=False):
+        """
+        Balances the classes of the training set with one of the Resampler methods.
+
+        Parameters:
+        - X_train (pd.DataFrame): Training feature set.
+        - y_train (pd.Series): Training target set.
+        - method (str): 'smote', 'undersample', 'subsample_smote' or 'reweight'.
+        - sampling_strategy (float): Target ratio of minority to majority samples.
+        - subsample (float): Fraction of the majority class kept by 'subsample_smote'.
+        - measure_memory (bool): Also trace the (process-wide) peak memory of the resampling.
+
+        Returns:
+        - X_train (pd.DataFrame): Resampled training feature set.
+        - y_train (pd.Series): Resampled training target set.
+        - sample_weight (np.ndarray or None): Weight of every training row ('reweight' only).
+        """
+        self.logger.info("Applying %s to address class imbalance.", method)
+        resampler = Resampler(method, sampling_strategy=sampling_strategy, subsample=subsample,
+                              measure_memory=measure_memory)
+        return resampler.resample(X_train, y_train)
+
+    def walk_forward_folds(self, datetimes, split_date, n_folds=5, mode='expanding'):
+        """
+        Builds walk-forward (rolling-origin) folds over rows sorted by date.
+
+        The period from split_date to the last date is divided into n_folds test windows of
+        equal duration. Each fold trains on the rows before its test window: all of them for
+        'expanding' folds, or a window as long as the initial training period (first date to
+        split_date) for 'sliding' folds. Folds are position ranges found with searchsorted, so
+        they slice the sorted data without copying it.
+
+        Parameters:
+        - datetimes (array-like): Datetime column, sorted in ascending order.
+        - split_date (str): Start of the first test window.
+        - n_folds (int): Number of folds.
+        - mode (str): 'expanding' or 'sliding' training windows.
+
+        Returns:
+        - list: (train, test) pairs of slices over the sorted rows.
+        """
+        if mode not in ('expanding', 'sliding'):
+            raise ValueError("Unsupported walk-forward mode: choose 'expanding' or 'sliding'.")
+        if n_folds < 1:
+            raise ValueError("n_folds must be at least 1.")
+
+        values = np.asarray(datetimes, dtype='datetime64[ns]')
+        if len(values) == 0 or np.isnat(values).any() or (values[1:] < values[:-1]).any():
+            raise ValueError("Walk-forward folds need non-missing datetimes sorted in ascending order.")
+        start, end = values[0], values[-1]
+        split = np.datetime64(pd.Timestamp(split_date), 'ns')
+        if not start < split <= end:
+            raise ValueError(f"split_date {split_date} must fall after the first and not after the last date.")
+
+        # Test windows of equal duration from the split date to the last date (inclusive)
+        span = (end - split).astype(np.int64)
+        edges = split + (span * np.arange(n_folds + 1) // n_folds).astype('timedelta64[ns]')
+        positions = np.searchsorted(values, edges, side='left')
+        positions[-1] = len(values)
+        train_span = split - start
+
+        folds = []
+        for fold in range(n_folds):
+            train_start = 0 if mode == 'expanding' else int(np.searchsorted(values, edges[fold] - train_span, side='left'))
+            train, test = slice(train_start, int(positions[fold])), slice(int(positions[fold]), int(positions[fold + 1]))
+            self.logger.info("Fold %d: %d training rows, %d test rows from %s.", fold, train.stop - train.start,
+                             test.stop - test.start, pd.Timestamp(edges[fold]))
+            folds.append((train, test))
+        return folds
+
+    def _contiguous_cut(self, datetimes, split_date):
+        """
+        Returns the position splitting the rows into contiguous training and test blocks, if there is one.
+
+        Rows sorted by date are cut with a binary search. Rows that are not sorted but already
+        partitioned into rows before and from the split date (e.g. a training frame followed by
+        a test frame) are cut after a single comparison pass.
+
+        Parameters:
+        - datetimes (pd.Series): Datetime column.
+        - split_date (str): Date string to use as the split point.
+
+        Returns:
+        - int or None: Number of training rows, or None if the split is not contiguous.
+        """
+        if datetimes.hasnans:
+            return None  # Missing dates belong to neither set
+        if datetimes.is_monotonic_increasing:
+            return int(datetimes.searchsorted(pd.Timestamp(split_date), side='left'))
+
+        is_train = (datetimes < split_date).to_numpy()
+        cut = int(is_train.sum())
+        return cut if is_train[:cut].all() else None
+
     def _detect_datetime_column(self, df):
         """
         Attempts to auto-detect a datetime column in the DataFrame.
@@ -0,0 +1,146 @@
+import time
+import threading
+import tracemalloc
+import numpy as np
+import pandas as pd
+from lib.Logger import Logger
+from imblearn.over_sampling import SMOTE, SMOTENC
+
+
+class Resampler:
+    METHODS = ('smote', 'undersample', 'subsample_smote', 'reweight')
+    _tracing_lock = threading.Lock()  # Guards starting and stopping the process-wide tracemalloc
+    _tracing_users = 0
+    _tracing_started = False  # Whether tracemalloc was started here, rather than by the caller
+
+    def __init__(self, method='smote', sampling_strategy=0.5, subsample=0.1, random_state=42, measure_memory=False):
+        """
+        Initialize the Resampler class.
+
+        Balances the classes of a training set with one of:
+        - 'smote': SMOTE over the whole training set (k-NN over every row); SMOTENC when the
+          features include native 'category' columns.
+        - 'undersample': random undersampling of the majority class to the target ratio.
+        - 'subsample_smote': SMOTE run on all minority rows and a random subsample of the majority class.
+        - 'reweight': no resampling; minority rows get a sample weight so they count as if
+          oversampled to the target ratio (passed to the model as sample_weight).
+
+        Parameters:
+        - method (str): Resampling method, one of Resampler.METHODS.
+        - sampling_strategy (float): Target ratio of minority to majority samples.
+        - subsample (float): Fraction of the majority class kept by 'subsample_smote' (at least the
+          minority count divided by sampling_strategy).
+        - random_state (int): Seed of the random sampling.
+        - measure_memory (bool): Trace the peak memory of the resampling with tracemalloc, which slows
+          it down. The peak is process-wide: it also counts what other threads allocate meanwhile,
+          so it is only attributable to the resampling when nothing else runs concurrently.
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unsupported resampling method '{method}': choose one of {self.METHODS}.")
+        self.logger = Logger().get_logger(self.__class__.__name__)
+        self.method = method
+        self.sampling_strategy = sampling_strategy
+        self.subsample = subsample
+        self.random_state = random_state
+        self.measure_memory = measure_memory
+        self.report = None
+
+    def resample(self, X_train, y_train):
+        """
+        Resamples the training set and logs the time it took, and the peak memory if measure_memory.
+
+        Parameters:
+        - X_train (pd.DataFrame): Training feature set.
+        - y_train (pd.Series): Training target set.
+
+        Returns:
+        - X_train (pd.DataFrame): Resampled training feature set.
+        - y_train (pd.Series): Resampled training target set.
+        - sample_weight (np.ndarray or None): Weight of every training row ('reweight' only).
+        """
+        self.logger.info(f"Class distribution before {self.method}: {y_train.value_counts().to_dict()}")
+        if self.measure_memory:
+            start_memory = self._start_tracing()
+        start_time = time.perf_counter()
+        try:
+            X_resampled, y_resampled, sample_weight = getattr(self, f"_{self.method}")(X_train, y_train)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            peak_memory = self._stop_tracing(start_memory) if self.measure_memory else None
+
+        self.report = {'method': self.method, 'seconds': elapsed, 'peak_bytes': peak_memory,
+                       'peak_scope': 'process' if self.measure_memory else None,
+                       'rows_before': len(y_train), 'rows_after': len(y_resampled)}
+        self.logger.info(f"Class distribution after {self.method}: {y_resampled.value_counts().to_dict()}")
+        if self.measure_memory:
+            self.logger.info("Resampled with %s in %.2f s, process peak memory %.1f MB: %d -> %d rows",
+                             self.method, elapsed, peak_memory / 1024 ** 2, len(y_train), len(y_resampled))
+        else:
+            self.logger.info("Resampled with %s in %.2f s: %d -> %d rows",
+                             self.method, elapsed, len(y_train), len(y_resampled))
+        return X_resampled, y_resampled, sample_weight
+
+    @classmethod
+    def _start_tracing(cls):
+        """Starts tracemalloc for the first concurrent measurement and returns the traced memory now."""
+        with cls._tracing_lock:
+            if cls._tracing_users == 0:
+                cls._tracing_started = not tracemalloc.is_tracing()
+                if cls._tracing_started:
+                    tracemalloc.start()
+            cls._tracing_users += 1
+            tracemalloc.reset_peak()
+            return tracemalloc.get_traced_memory()[0]
+
+    @classmethod
+    def _stop_tracing(cls, start_memory):
+        """Returns the process peak above start_memory, stopping tracemalloc after the last measurement."""
+        with cls._tracing_lock:
+            peak_memory = tracemalloc.get_traced_memory()[1] - start_memory
+            cls._tracing_users -= 1
+            if cls._tracing_users == 0 and cls._tracing_started:
+                tracemalloc.stop()
+            return peak_memory
+
+    def _smote(self, X_train, y_train):
+        # Native 'category' columns cannot be interpolated; SMOTENC draws them from the neighbours instead
+        if any(isinstance(dtype, pd.CategoricalDtype) for dtype in getattr(X_train, 'dtypes', [])):
+            sampler = SMOTENC(categorical_features='auto', sampling_strategy=self.sampling_strategy,
+                              random_state=self.random_state)
+        else:
+            sampler = SMOTE(sampling_strategy=self.sampling_strategy, random_state=self.random_state)
+        X_resampled, y_resampled = sampler.fit_resample(X_train, y_train)
+        return X_resampled, y_resampled, None
+
+    def _undersample(self, X_train, y_train):
+        minority, majority = self._class_positions(y_train)
+        keep = min(len(majority), int(np.ceil(len(minority) / self.sampling_strategy)))
+        return self._take(X_train, y_train, minority, majority, keep) + (None,)
+
+    def _subsample_smote(self, X_train, y_train):
+        minority, majority = self._class_positions(y_train)
+        # Keep enough majority rows for the target ratio to still require new minority rows
+        keep = min(len(majority), max(int(np.ceil(len(majority) * self.subsample)),
+                                      int(np.ceil((len(minority) + 1) / self.sampling_strategy))))
+        X_subsample, y_subsample = self._take(X_train, y_train, minority, majority, keep)
+        return self._smote(X_subsample, y_subsample)
+
+    def _reweight(self, X_train, y_train):
+        minority, majority = self._class_positions(y_train)
+        sample_weight = np.ones(len(y_train))
+        if len(minority):
+            # Weight the minority rows as if they were oversampled to the target ratio
+            sample_weight[minority] = max(1.0, self.sampling_strategy * len(majority) / len(minority))
+        return X_train, y_train, sample_weight
+
+    def _class_positions(self, y_train):
+        labels = y_train.to_numpy()
+        values, counts = np.unique(labels, return_counts=True)
+        minority_label = values[np.argmin(counts)]
+        return np.flatnonzero(labels == minority_label), np.flatnonzero(labels != minority_label)
+
+    def _take(self, X_train, y_train, minority, majority, keep):
+        """Keeps every minority row and a random sample of `keep` majority rows, in their original order."""
+        rng = np.random.default_rng(self.random_state)
+        positions = np.sort(np.concatenate([minority, rng.choice(majority, size=keep, replace=False)]))
+        return X_train.iloc[positions], y_train.iloc[positions]
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+
+class RiskLookup:
+    registry = {}
+
+    def __init__(self, column, values=None, mapping=None, default=None):
+        """
+        Initialize the RiskLookup class.
+
+        A lookup maps the values of one column to a flag or a code, e.g. high-risk MCCs,
+        blocklisted merchants or error messages. It is compiled once into a hash index of
+        its keys and a table of results, and applied to a whole column with one vectorized
+        index lookup instead of a Python function call per row. For categorical columns only
+        the categories are looked up and the result is taken through the category codes.
+
+        Parameters:
+        - column (str): Column the lookup applies to.
+        - values (iterable, optional): Values to flag; the result is True for these and False otherwise.
+        - mapping (dict, optional): Value to code mapping, e.g. {"Bad PIN": 1, "Bad CVV": 2}.
+        - default (optional): Result for values not in the mapping (False for value sets, 0 for mappings).
+        """
+        if (values is None) == (mapping is None):
+            raise ValueError("Exactly one of values or mapping must be specified.")
+
+        if mapping is None:
+            mapping = dict.fromkeys(values, True)
+            default = False if default is None else default
+        else:
+            mapping = dict(mapping)
+            default = 0 if default is None else default
+
+        self.column = column
+        self.keys = pd.Index(list(mapping))
+        # The last entry holds the default and is selected by the -1 of keys not found
+        self.table = np.array([*mapping.values(), default])
+
+    def apply(self, series):
+        """
+        Applies the lookup to a column.
+
+        Parameters:
+        - series (pd.Series): Column to look up.
+
+        Returns:
+        - pd.Series: Flags or codes aligned with the input column.
+        """
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            table = self.table[self.keys.get_indexer(series.cat.categories)]
+            table = np.append(table, self.table[-1])
+            positions = series.cat.codes.to_numpy()
+        else:
+            table = self.table
+            positions = self.keys.get_indexer(series)
+        return pd.Series(table[positions], index=series.index)
+
+    @classmethod
+    def register(cls, name, column, values=None, mapping=None, default=None):
+        """
+        Registers a named lookup, replacing any lookup of the same name.
+
+        Parameters:
+        - name (str): Name strategies use to request the lookup.
+        - column (str): Column the lookup applies to.
+        - values (iterable, optional): Values to flag.
+        - mapping (dict, optional): Value to code mapping.
+        - default (optional): Result for values not in the lookup.
+
+        Returns:
+        - RiskLookup: The registered lookup.
+        """
+        cls.registry[name] = cls(column, values=values, mapping=mapping, default=default)
+        return cls.registry[name]
+
+    @classmethod
+    def get(cls, name):
+        """
+        Returns a registered lookup.
+
+        Parameters:
+        - name (str): Name of the lookup.
+
+        Returns:
+        - RiskLookup: Registered lookup.
+        """
+        if name not in cls.registry:
+            raise KeyError(f"Unknown risk lookup: {name}")
+        return cls.registry[name]
+
+
+# Lookups shared by the strategies; strategies can register their own with RiskLookup.register
+RiskLookup.register('high_risk_mcc', 'MCC', values=[4814, 5411, 5813, 5999])
+RiskLookup.register('bad_pin', 'Errors?', values=["Bad PIN"])
@@ -1,11 +1,19 @@
+import warnings
+import joblib
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+import pyarrow as pa
+import pyarrow.parquet as pq
 from lib.Logger import Logger
+from lib.CategoryEncoder import CategoryEncoder
+from sklearn.base import clone
 from sklearn.preprocessing import StandardScaler
 
 
 class ScaleEncode:
-    def __init__(self, data_path=None, data=None, scaler=None):
+    def __init__(self, data_path=None, data=None, scaler=None, sparse=False, max_cardinality=None, high_cardinality=None,
+                 native_categorical=False, categorical_columns=None):
         """
         Initialize the ScaleEncode class.
 
@@ -13,11 +21,34 @@ class ScaleEncode:
         - data_path (str): Path to the input data file (optional if data is provided).
         - data (pd.DataFrame): DataFrame to be used directly (optional if data_path is provided).
         - scaler: Scaler instance from sklearn (default is StandardScaler if None).
+        - sparse (bool): Output one-hot columns as pandas sparse columns, with memory proportional
+          to the number of non-zeros, instead of dense boolean columns.
+        - max_cardinality (int): Categorical columns with more distinct values are dropped when
+          auto-encoding (default 5 for dense output and no limit for sparse output).
+        - high_cardinality (str): Instead of dropping them, encode the columns above max_cardinality with
+          a CategoryEncoder method ('frequency', 'target' or 'hashing'); only used by fit/transform.
+        - native_categorical (bool): Keep the categorical columns as pandas 'category' columns with the
+          fitted categories instead of one-hot encoding them, for models splitting on categories
+          natively. No column is dropped for its cardinality unless max_cardinality is given.
+        - categorical_columns (list, optional): Numeric code columns (e.g. 'MCC') also treated as
+          categorical in native_categorical mode.
         """
         self.logger = Logger().get_logger(self.__class__.__name__)
         self.data_path = data_path
         self.data = data
         self.scaler = scaler or StandardScaler()
+        self.sparse = sparse
+        self.max_cardinality = max_cardinality if max_cardinality is not None or sparse or native_categorical else 5
+        self.high_cardinality = high_cardinality
+        if high_cardinality is not None and high_cardinality not in CategoryEncoder.METHODS:
+            raise ValueError(f"Unsupported high-cardinality encoding '{high_cardinality}': "
+                             f"choose one of {CategoryEncoder.METHODS}.")
+        self.native_categorical = native_categorical
+        self.categorical_columns = list(categorical_columns or [])
+        if self.categorical_columns and not native_categorical:
+            raise ValueError("categorical_columns are only used with native_categorical.")
+        self.state = None  # Fitted state of fit(), applied by transform()
+        self._fitted_encodings = []  # Out-of-fold encodings of the fitted rows, used by fit_transform()
         if data_path:
             self.logger.info("Initialized with data path: %s", data_path)
         elif isinstance(data, pd.DataFrame):
@@ -51,7 +82,7 @@ class ScaleEncode:
         # Handle NaN and infinite values in numeric columns
         unsafe_columns = self._find_and_handle_unsafe_columns(df)
         if unsafe_columns:
-            self.logger.warning("Handled unsafe numeric columns: %s", unsafe_columns)
+            self.logger.warning("Handled unsafe columns (replaced values per column): %s", unsafe_columns)
 
         # Scale the data
         if self.scaler:
@@ -65,6 +96,407 @@ class ScaleEncode:
         
         return df
 
+    def fit(self, target_col=None, specific_columns_to_encode=None):
+        """
+        Learns the encoding, fill values and scaling from the input data, e.g. the training split.
+
+        The fitted state holds the category vocabulary of every encoded column, the dropped or
+        CategoryEncoder-encoded high-cardinality columns, the median or mode fill values, a fitted
+        copy of the scaler and the output column layout, so transform() gives the same columns for
+        any later batch.
+
+        Parameters:
+        - target_col (str): Name of the target column to exclude from scaling and filling.
+        - specific_columns_to_encode (list): List of categorical columns to specifically encode (optional).
+
+        Returns:
+        - ScaleEncode: The fitted instance.
+        """
+        df = self._read_dataframe()
+        excluded = [target_col] if target_col in df.columns else []
+
+        # Encoded columns and their category vocabularies
+        if specific_columns_to_encode:
+            if isinstance(specific_columns_to_encode, str):
+                specific_columns_to_encode = [specific_columns_to_encode]
+            columns_to_encode, dropped = list(specific_columns_to_encode), []
+        else:
+            candidates = self._categorical_candidates(df.drop(columns=excluded))
+            dropped = [col for col in candidates
+                       if self.max_cardinality is not None and df[col].nunique() > self.max_cardinality]
+            columns_to_encode = [col for col in candidates if col not in dropped]
+            if self.high_cardinality is None:
+                for col in dropped:
+                    self.logger.warning("Dropping high-cardinality column '%s'", col)
+        vocabularies = {col: list(pd.Categorical(df[col]).categories) for col in columns_to_encode}
+
+        # High-cardinality columns keep a fixed width through a CategoryEncoder instead of being dropped
+        encoders, self._fitted_encodings = {}, []
+        if self.high_cardinality is not None:
+            target = df[target_col] if excluded else None
+            for col in dropped:
+                encoders[col] = CategoryEncoder(self.high_cardinality)
+                self._fitted_encodings.append(encoders[col].fit_transform(df[col], target))
+                self.logger.info("Encoding high-cardinality column '%s' with %s encoding", col, self.high_cardinality)
+            dropped = []
+
+        # Fill values: median of the finite values for numeric columns, mode for the others
+        kept = df.drop(columns=dropped + columns_to_encode + list(encoders) + excluded)
+        numeric_columns = list(kept.select_dtypes(include=['number']).columns)
+        fill_values = {}
+        for col in kept.columns:
+            if col in numeric_columns:
+                values = kept[col].to_numpy(dtype=np.float64)
+                finite = values[np.isfinite(values)]
+                fill_values[col] = float(np.median(finite)) if finite.size else 0.0
+            elif kept[col].isna().any():
+                fill_values[col] = kept[col].mode()[0]
+
+        self.state = {
+            'target_col': target_col,
+            'sparse': self.sparse,
+            'native_categorical': self.native_categorical,
+            'dropped': dropped,
+            'vocabularies': vocabularies,
+            'encoders': encoders,
+            'fill_values': fill_values,
+            'numeric_columns': numeric_columns,
+            'scaler': None,
+            'columns': None,
+        }
+
+        # Fit the scaler on the filled numeric columns and record the output layout
+        filled = self._fill(kept[numeric_columns])
+        if self.scaler and numeric_columns:
+            self.state['scaler'] = clone(self.scaler).fit(filled)
+        self.state['columns'] = (list(self._encode(df.drop(columns=dropped + list(encoders))).columns)
+                                 + [col for encoded in self._fitted_encodings for col in encoded.columns])
+        self.logger.info("Fitted on %d rows: %d %s, %d category-encoded, %d dropped, %d scaled columns.",
+                         len(df), len(vocabularies), "native categorical" if self.native_categorical else "one-hot encoded",
+                         len(encoders), len(dropped), len(numeric_columns))
+        return self
+
+    def transform(self, df=None):
+        """
+        Applies the fitted state to a DataFrame with a fixed output column layout.
+
+        Categories not seen by fit() encode as all-zero dummy columns, and dummy columns of
+        categories missing from the batch are still produced.
+
+        Parameters:
+        - df (pd.DataFrame, optional): DataFrame to transform (the input data if not provided).
+
+        Returns:
+        - pd.DataFrame: Scaled and encoded DataFrame.
+        """
+        if self.state is None:
+            raise ValueError("ScaleEncode must be fitted or loaded before transform.")
+        if df is None:
+            df = self._read_dataframe()
+        encodings = [encoder.transform(df[col]) for col, encoder in self.state['encoders'].items()]
+        return self._transform(df, encodings)
+
+    def _transform(self, df, encodings):
+        """
+        Applies the fitted state, appending the given high-cardinality encodings.
+
+        Parameters:
+        - df (pd.DataFrame): DataFrame to transform.
+        - encodings (list): DataFrames produced by the fitted CategoryEncoders.
+
+        Returns:
+        - pd.DataFrame: Scaled and encoded DataFrame.
+        """
+        removed = self.state['dropped'] + list(self.state['encoders'])
+        df = self._encode(df.drop(columns=[col for col in removed if col in df.columns]))
+        df = self._fill(df)
+        numeric_columns = self.state['numeric_columns']
+        if self.state['scaler'] is not None:
+            scaled = self.state['scaler'].transform(df[numeric_columns])
+            df[numeric_columns] = pd.DataFrame(scaled, index=df.index, columns=numeric_columns)
+        if encodings:
+            df = pd.concat([df, *encodings], axis=1)
+
+        # A batch without the target column is transformed for scoring
+        columns = [col for col in self.state['columns'] if col != self.state['target_col'] or col in df.columns]
+        missing = [col for col in columns if col not in df.columns]
+        if missing:
+            raise ValueError(f"Columns missing from the data to transform: {missing}")
+        return df[columns]
+
+    def fit_transform(self, target_col=None, specific_columns_to_encode=None):
+        """
+        Fits on the input data and transforms it.
+
+        Target-encoded columns of the fitted rows are out-of-fold, so use this rather than
+        fit().transform() on the training data.
+
+        Returns:
+        - pd.DataFrame: Scaled and encoded DataFrame.
+        """
+        self.fit(target_col, specific_columns_to_encode)
+        encodings, self._fitted_encodings = self._fitted_encodings, []
+        return self._transform(self._read_dataframe(), encodings)
+
+    def fit_stream(self, target_col=None, specific_columns_to_encode=None, batch_size=1_000_000, sample_size=1_000_000):
+        """
+        Fits the encoding, fill values and scaling from the parquet file, reading it in record batches.
+
+        Peak memory is a few batches instead of the whole file. A first pass collects the
+        category vocabularies and a uniform row sample from which the median and mode fill
+        values are estimated, and a second pass fits the scaler with partial_fit on the filled
+        batches. The fitted state is the same as the one of fit(), so transform(), save() and
+        load() work unchanged.
+
+        Parameters:
+        - target_col (str): Name of the target column to exclude from scaling and filling.
+        - specific_columns_to_encode (list): List of categorical columns to specifically encode (optional).
+        - batch_size (int): Number of rows per record batch.
+        - sample_size (int): Approximate number of sampled rows used for the fill values.
+
+        Returns:
+        - ScaleEncode: The fitted instance.
+        """
+        if self.high_cardinality is not None:
+            raise ValueError("High-cardinality encoders need the whole training data; use fit() instead.")
+        if self.scaler and not hasattr(self.scaler, 'partial_fit'):
+            raise ValueError(f"{self.scaler.__class__.__name__} has no partial_fit and cannot be fitted in batches.")
+        if isinstance(specific_columns_to_encode, str):
+            specific_columns_to_encode = [specific_columns_to_encode]
+
+        parquet_file = pq.ParquetFile(self._stream_path())
+        keep_probability = min(1.0, sample_size / max(parquet_file.metadata.num_rows, 1))
+        rng = np.random.default_rng(42)
+
+        # First pass: category vocabularies, missing values and a uniform sample of the rows
+        columns_to_encode, numeric_columns, uniques, samples, has_nan, head, rows = None, None, {}, [], set(), None, 0
+        for batch in self._iter_batches(parquet_file, batch_size):
+            if head is None:
+                head = batch.head(1)
+                excluded = [target_col] if target_col in batch.columns else []
+                if specific_columns_to_encode:
+                    columns_to_encode = list(specific_columns_to_encode)
+                else:
+                    columns_to_encode = self._categorical_candidates(batch.drop(columns=excluded))
+                kept_columns = [col for col in batch.columns if col not in columns_to_encode + excluded]
+                numeric_columns = list(batch[kept_columns].select_dtypes(include=['number']).columns)
+                uniques = {col: set() for col in columns_to_encode}
+
+            for col in columns_to_encode:
+                values = uniques[col]
+                if values is not None:
+                    values.update(batch[col].dropna().unique())
+                    if not specific_columns_to_encode and self.max_cardinality is not None \
+                            and len(values) > self.max_cardinality:
+                        uniques[col] = None  # Dropped, stop collecting
+            has_nan.update(col for col in kept_columns if batch[col].isna().any())
+            samples.append(batch.loc[rng.random(len(batch)) < keep_probability, kept_columns])
+            rows += len(batch)
+
+        if head is None:
+            raise ValueError(f"No rows to fit in {self.data_path}.")
+        dropped = [col for col in columns_to_encode if uniques[col] is None]
+        for col in dropped:
+            self.logger.warning("Dropping high-cardinality column '%s'", col)
+        vocabularies = {col: sorted(uniques[col]) for col in columns_to_encode if col not in dropped}
+
+        sample = pd.concat(samples)
+        fill_values = {}
+        for col in kept_columns:
+            if col in numeric_columns:
+                values = sample[col].to_numpy(dtype=np.float64)
+                finite = values[np.isfinite(values)]
+                fill_values[col] = float(np.median(finite)) if finite.size else 0.0
+            elif col in has_nan and sample[col].notna().any():
+                fill_values[col] = sample[col].mode()[0]
+
+        self.state = {
+            'target_col': target_col,
+            'sparse': self.sparse,
+            'native_categorical': self.native_categorical,
+            'dropped': dropped,
+            'vocabularies': vocabularies,
+            'encoders': {},
+            'fill_values': fill_values,
+            'numeric_columns': numeric_columns,
+            'scaler': None,
+            'columns': None,
+        }
+        self.state['columns'] = list(self._encode(head.drop(columns=dropped)).columns)
+
+        # Second pass: fit the scaler on the filled numeric columns, batch by batch
+        if self.scaler and numeric_columns:
+            scaler = clone(self.scaler)
+            for batch in self._iter_batches(parquet_file, batch_size, columns=numeric_columns):
+                scaler.partial_fit(self._fill(batch))
+            self.state['scaler'] = scaler
+        self.logger.info("Fitted in batches on %d rows (%d sampled for fill values): %d encoded, %d dropped, %d scaled columns.",
+                         rows, len(sample), len(vocabularies), len(dropped), len(numeric_columns))
+        return self
+
+    def transform_stream(self, save_to, data_path=None, batch_size=1_000_000):
+        """
+        Transforms a parquet file in record batches, writing each batch to a parquet file.
+
+        Parameters:
+        - save_to (str): Path of the parquet file to write.
+        - data_path (str, optional): Parquet file to transform (the input file if not provided).
+        - batch_size (int): Number of rows per record batch.
+
+        Returns:
+        - int: Number of rows written.
+        """
+        if self.state is None:
+            raise ValueError("ScaleEncode must be fitted or loaded before transform.")
+        if self.state['sparse']:
+            raise ValueError("Sparse columns cannot be written to parquet; use sparse=False for streaming.")
+
+        parquet_file = pq.ParquetFile(data_path or self._stream_path())
+        writer, rows = None, 0
+        try:
+            for batch in self._iter_batches(parquet_file, batch_size):
+                table = pa.Table.from_pandas(self.transform(batch), preserve_index=False,
+                                             schema=writer.schema if writer is not None else None)
+                if writer is None:
+                    writer = pq.ParquetWriter(save_to, table.schema)
+                writer.write_table(table)
+                rows += table.num_rows
+        finally:
+            if writer is not None:
+                writer.close()
+        self.logger.info("Streamed %d scaled and encoded rows to %s", rows, save_to)
+        return rows
+
+    def scale_and_encode_stream(self, save_to, target_col=None, specific_columns_to_encode=None, batch_size=1_000_000):
+        """
+        Streaming counterpart of scale_and_encode for parquet files larger than memory.
+
+        Parameters:
+        - save_to (str): Path of the parquet file to write.
+        - target_col (str): Name of the target column to exclude from scaling.
+        - specific_columns_to_encode (list): List of categorical columns to specifically encode (optional).
+        - batch_size (int): Number of rows per record batch.
+
+        Returns:
+        - int: Number of rows written.
+        """
+        self.fit_stream(target_col, specific_columns_to_encode, batch_size=batch_size)
+        return self.transform_stream(save_to, batch_size=batch_size)
+
+    def save(self, path):
+        """
+        Saves the fitted state to a file.
+
+        Parameters:
+        - path (str): Path of the artifact to write.
+        """
+        if self.state is None:
+            raise ValueError("ScaleEncode must be fitted before it can be saved.")
+        joblib.dump(self.state, path)
+        self.logger.info("Fitted state saved to %s", path)
+
+    @classmethod
+    def load(cls, path, data_path=None, data=None):
+        """
+        Creates a ScaleEncode from a fitted state saved by save().
+
+        Parameters:
+        - path (str): Path of the saved artifact.
+        - data_path (str): Path to the data file to transform (optional).
+        - data (pd.DataFrame): DataFrame to transform (optional).
+
+        Returns:
+        - ScaleEncode: Fitted instance ready for transform().
+        """
+        state = joblib.load(path)
+        instance = cls.__new__(cls)
+        instance.logger = Logger().get_logger(cls.__name__)
+        instance.data_path = data_path
+        instance.data = data
+        instance.scaler = state['scaler']
+        instance.sparse = state['sparse']
+        instance.max_cardinality = None
+        instance.high_cardinality = None
+        instance.native_categorical = state.get('native_categorical', False)
+        instance.categorical_columns = []
+        instance._fitted_encodings = []
+        instance.state = state
+        instance.logger.info("Fitted state loaded from %s", path)
+        return instance
+
+    def _encode(self, df):
+        """
+        One-hot encodes the fitted columns against their vocabularies, dropping the first category.
+
+        Sparse output is built directly from the category codes as one CSR matrix per column,
+        without materializing a dense column per category. In native_categorical mode the columns
+        are instead set to the 'category' type of their vocabulary, in place; categories not seen
+        by fit() become missing values.
+
+        Parameters:
+        - df (pd.DataFrame): DataFrame to encode.
+
+        Returns:
+        - pd.DataFrame: Encoded DataFrame with the dummy columns appended.
+        """
+        vocabularies = self.state['vocabularies']
+        if self.state.get('native_categorical'):
+            return df.assign(**{col: pd.Categorical(df[col], categories=categories)
+                                for col, categories in vocabularies.items()})
+        dummies = []
+        for col, categories in vocabularies.items():
+            codes = pd.Categorical(df[col], categories=categories).codes
+            names = [f"{col}_{category}" for category in categories[1:]]
+            if self.state['sparse']:
+                rows = np.flatnonzero(codes > 0)
+                matrix = sp.csr_matrix((np.ones(len(rows), dtype=bool), (rows, codes[rows] - 1)),
+                                       shape=(len(df), len(names)))
+                dummies.append(pd.DataFrame.sparse.from_spmatrix(matrix, index=df.index, columns=names))
+            else:
+                dummies.append(pd.DataFrame({name: codes == code for code, name in enumerate(names, start=1)},
+                                            index=df.index))
+        df = df.drop(columns=list(vocabularies))
+        return pd.concat([df, *dummies], axis=1) if dummies else df
+
+    def _fill(self, df):
+        """
+        Replaces NaN and infinite values with the fitted fill values.
+
+        Parameters:
+        - df (pd.DataFrame): DataFrame to fill.
+
+        Returns:
+        - pd.DataFrame: DataFrame without NaN or infinite values in the fitted columns.
+        """
+        df = df.copy(deep=False)
+        for col, value in self.state['fill_values'].items():
+            if col not in df.columns:
+                continue
+            if col in self.state['numeric_columns']:
+                values = df[col].to_numpy(dtype=np.float64)
+                unsafe = ~np.isfinite(values)
+                if unsafe.any():  # Only float columns hold NaN or infinite values
+                    df[col] = np.where(unsafe, value, values).astype(df[col].dtype)
+            elif df[col].isna().any():
+                df[col] = df[col].fillna(value)
+        return df
+
+    def _categorical_candidates(self, df):
+        """Returns the columns encoded as categories: string and category columns, and the declared code columns."""
+        candidates = list(df.select_dtypes(include=['category', 'object', 'str']).columns)
+        return candidates + [col for col in self.categorical_columns if col in df.columns and col not in candidates]
+
+    def _stream_path(self):
+        if not self.data_path:
+            raise ValueError("Streaming mode reads from a parquet file; data_path must be specified.")
+        return self.data_path
+
+    @staticmethod
+    def _iter_batches(parquet_file, batch_size, columns=None):
+        """Yields the record batches of a parquet file as DataFrames."""
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
     def _read_dataframe(self):
         """
         Reads the DataFrame either from a file or directly if provided.
@@ -82,6 +514,7 @@ class ScaleEncode:
     def _auto_encode(self, df):
         """
         Automatically encodes all categorical columns with one-hot encoding, dropping columns with high cardinality.
+        In native_categorical mode they are converted to the 'category' type instead.
 
         Parameters:
         - df (pd.DataFrame): DataFrame to encode.
@@ -89,16 +522,21 @@ class ScaleEncode:
         Returns:
         - pd.DataFrame: Encoded DataFrame.
         """
-        columns_to_encode = df.select_dtypes(include=['category', 'object']).columns
+        columns_to_encode = self._categorical_candidates(df)
         columns_to_drop = []
 
         for col in columns_to_encode:
-            if df[col].nunique() > 5:
+            if self.max_cardinality is not None and df[col].nunique() > self.max_cardinality:
                 self.logger.warning("Dropping high-cardinality column '%s'", col)
                 columns_to_drop.append(col)
 
         df = df.drop(columns=columns_to_drop)
-        df = pd.get_dummies(df, columns=[col for col in columns_to_encode if col not in columns_to_drop], drop_first=True)
+        if self.native_categorical:
+            encoded = [col for col in columns_to_encode if col not in columns_to_drop]
+            self.logger.info("Kept categorical columns as native categories: %s", encoded)
+            return df.assign(**{col: df[col].astype('category') for col in encoded})
+        df = pd.get_dummies(df, columns=[col for col in columns_to_encode if col not in columns_to_drop],
+                            drop_first=True, sparse=self.sparse)
         self.logger.info("Auto-encoding completed. Encoded columns: %s", list(columns_to_encode))
         return df
 
@@ -115,42 +553,66 @@ class ScaleEncode:
         """
         if isinstance(columns_to_encode, str):
             columns_to_encode = [columns_to_encode]
-        df = pd.get_dummies(df, columns=columns_to_encode, drop_first=True)
+        if self.native_categorical:
+            self.logger.info("Specific columns kept as native categories: %s", columns_to_encode)
+            return df.assign(**{col: df[col].astype('category') for col in columns_to_encode})
+        df = pd.get_dummies(df, columns=columns_to_encode, drop_first=True, sparse=self.sparse)
         self.logger.info("Specific columns encoded: %s", columns_to_encode)
         return df
 
-    def _find_and_handle_unsafe_columns(self, df):
+    def _find_and_handle_unsafe_columns(self, df, block_size=64):
         """
         Identifies columns with NaN or infinite values, replacing them with median or mode values as appropriate.
 
+        Float columns are scanned in blocks of block_size columns with one NumPy pass per block,
+        and the medians of all unsafe columns are computed together with a NaN-aware reduction
+        (infinite values are excluded from the median). Integer columns cannot hold NaN or
+        infinite values and are skipped.
+
         Parameters:
         - df (pd.DataFrame): DataFrame to process.
+        - block_size (int): Number of columns scanned per block.
 
         Returns:
-        - dict: A dictionary with column names as keys and issue types ('inf', 'nan') as values.
+        - dict: A dictionary with column names as keys and the number of replaced values per issue type
+          ({'inf': n, 'nan': m}) as values.
         """
-        numeric_columns = df.select_dtypes(include=['number']).columns
+        float_columns = list(df.select_dtypes(include=['floating']).columns)
         handled_columns = {}
 
-        # Handle infinite values
-        for col in numeric_columns:
-            if np.isinf(df[col]).any():
-                median_value = df[~np.isinf(df[col])][col].median()
-                df[col] = df[col].replace([np.inf, -np.inf], median_value)
-                handled_columns[col] = 'inf'
-                self.logger.info("Replaced inf values in column '%s' with median: %f", col, median_value)
+        # Count NaN and infinite values per column, one block of columns at a time
+        unsafe = []
+        for start in range(0, len(float_columns), block_size):
+            block_columns = float_columns[start:start + block_size]
+            block = df[block_columns].to_numpy()
+            inf_counts = np.isinf(block).sum(axis=0)
+            nan_counts = np.isnan(block).sum(axis=0)
+            for col, inf_count, nan_count in zip(block_columns, inf_counts, nan_counts):
+                if inf_count or nan_count:
+                    unsafe.append(col)
+                    handled_columns[col] = {'inf': int(inf_count), 'nan': int(nan_count)}
 
-        # Handle NaN values
-        for col in df.columns[df.isna().any()]:
-            if col in numeric_columns:
-                median_value = df[col].median()
-                df[col] = df[col].fillna(median_value)
-                self.logger.info("Replaced NaN values in numeric column '%s' with median: %f", col, median_value)
-            else:
-                mode_value = df[col].mode()[0]
-                df[col] = df[col].fillna(mode_value)
-                self.logger.info("Replaced NaN values in non-numeric column '%s' with mode: %s", col, mode_value)
-            handled_columns[col] = 'nan'
+        # Median of the finite values of every unsafe column in one reduction
+        if unsafe:
+            values = df[unsafe].to_numpy(dtype=np.float64)
+            finite = np.where(np.isfinite(values), values, np.nan)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN columns keep NaN, as before
+                medians = np.nanmedian(finite, axis=0)
+            for col, median_value in zip(unsafe, medians):
+                column_values = df[col].to_numpy()
+                df[col] = np.where(np.isfinite(column_values), column_values, median_value).astype(column_values.dtype)
+                self.logger.info("Replaced %d inf and %d NaN values in column '%s' with median: %f",
+                                 handled_columns[col]['inf'], handled_columns[col]['nan'], col, median_value)
+
+        # Handle NaN values in non-numeric columns
+        other_columns = df.columns.difference(df.select_dtypes(include=['number']).columns, sort=False)
+        for col in other_columns[df[other_columns].isna().any().to_numpy()]:
+            nan_count = int(df[col].isna().sum())
+            mode_value = df[col].mode()[0]
+            df[col] = df[col].fillna(mode_value)
+            handled_columns[col] = {'nan': nan_count}
+            self.logger.info("Replaced %d NaN values in non-numeric column '%s' with mode: %s", nan_count, col, mode_value)
 
         return handled_columns
 
@@ -1,13 +1,25 @@
 import os
 import json
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from lib.FeatureExtractorFactory import create_feature_extractor
+from lib.FeatureExtractor import FeatureExtractor
+from lib.FeatureCache import FeatureCache
+from lib.FeatureStore import FeatureStore
+from lib.DtypeOptimizer import DtypeOptimizer
 from lib.ScaleEncode import ScaleEncode
 from lib.useModel import useModel
 from lib.Preprocessor import Preprocessor
+from lib.Resampler import Resampler
+from lib.ThresholdEvaluator import ThresholdEvaluator
 from lib.Logger import Logger  # Import the Logger class
 from sklearn.preprocessing import StandardScaler
 
 class StrategyTester:
+    evaluation_lock = None  # Lock shared by worker processes when appending evaluations
+
     def __init__(
         self,
         test_name,
@@ -21,7 +33,23 @@ class StrategyTester:
         model_params=None,
         num_rounds=100,
         scaler=None,
-        evaluation_file="evaluations.csv"
+        evaluation_file="evaluations.csv",
+        n_jobs=1,
+        feature_store_dir=None,
+        feature_store_max_bytes=20 * 1024 ** 3,
+        store_scaled=False,
+        compact_dtypes=True,
+        fit_on_train=True,
+        sparse_encoding=False,
+        high_cardinality_encoding=None,
+        cv_folds=None,
+        cv_mode="expanding",
+        cv_jobs=None,
+        resampling=None,
+        resampling_subsample=0.1,
+        measure_resampling_memory=False,
+        native_categorical=False,
+        categorical_columns=None
     ):
         """
         Initializes the StrategyTester class with configuration details.
@@ -35,6 +63,29 @@ class StrategyTester:
         - model_params (dict): Parameters for the model.
         - scaler: Scaler instance (default is StandardScaler).
         - evaluation_file (str): Path to save the evaluation results.
+        - n_jobs (int): Number of worker processes running strategies in parallel (1 runs them sequentially).
+        - feature_store_dir (str): Directory of the on-disk feature store (None disables it).
+        - feature_store_max_bytes (int): Size limit of the feature store before old frames are evicted.
+        - store_scaled (bool): Also store the scaled and encoded frames, not only the extracted features.
+        - compact_dtypes (bool): Downcast the extracted features to compact types before scaling.
+        - fit_on_train (bool): Fit the scaling and encoding on the training split only and save the fitted state.
+        - sparse_encoding (bool): One-hot encode into sparse columns and keep high-cardinality categoricals.
+        - high_cardinality_encoding (str): Encode high-cardinality categoricals with 'frequency', 'target' or
+          'hashing' encoding instead of dropping them (requires fit_on_train).
+        - cv_folds (int): Number of walk-forward folds from split_date to the last date (None for a single split).
+        - cv_mode (str): 'expanding' or 'sliding' training windows of the walk-forward folds.
+        - cv_jobs (int): Number of folds run concurrently in threads sharing the data (default: all folds).
+        - resampling (str): Class-imbalance handling of the training rows: 'smote', 'undersample',
+          'subsample_smote' or 'reweight' (default: 'smote' if apply_smote, else none). The target
+          minority to majority ratio is smote_sampling_strategy.
+        - resampling_subsample (float): Fraction of the majority class kept by 'subsample_smote'.
+        - measure_resampling_memory (bool): Log the peak memory of every resampling (traced with tracemalloc,
+          which slows it down). The peak is process-wide, so it is only measured when folds run one at a time.
+        - native_categorical (bool): Keep categorical columns as pandas 'category' columns, without
+          one-hot encoding or dropping high-cardinality ones, and let the model split on them
+          natively (XGBoost enable_categorical, CatBoost cat_features).
+        - categorical_columns (list): Numeric code columns (e.g. 'MCC') also treated as categorical
+          in native_categorical mode.
         """
         # Initialize the singleton logger with the test name
         self.logger = Logger(test_name).get_logger(self.__class__.__name__)
@@ -51,6 +102,33 @@ class StrategyTester:
         self.preprocessor = Preprocessor()
         self.apply_smote = apply_smote
         self.smote_sampling = smote_sampling_strategy
+        self.n_jobs = max(1, int(n_jobs))
+        self.feature_store_dir = feature_store_dir
+        self.feature_store_max_bytes = feature_store_max_bytes
+        self.store_scaled = store_scaled
+        self.compact_dtypes = compact_dtypes
+        self.fit_on_train = fit_on_train
+        self.sparse_encoding = sparse_encoding
+        self.high_cardinality_encoding = high_cardinality_encoding
+        self.cv_folds = cv_folds
+        self.cv_mode = cv_mode
+        self.cv_jobs = cv_jobs
+        self.resampling = resampling or ("smote" if apply_smote else None)
+        self.resampling_subsample = resampling_subsample
+        self.measure_resampling_memory = measure_resampling_memory
+        if measure_resampling_memory and cv_folds and cv_jobs != 1:
+            self.logger.warning("Resampling memory is process-wide and not measured while folds run concurrently; "
+                                "set cv_jobs=1 to measure it.")
+            self.measure_resampling_memory = False
+        self.native_categorical = native_categorical
+        self.categorical_columns = list(categorical_columns or [])
+        if self.categorical_columns and not native_categorical:
+            raise ValueError("categorical_columns are only used with native_categorical.")
+        if self.resampling and self.resampling not in Resampler.METHODS:
+            raise ValueError(f"Unsupported resampling method '{self.resampling}': choose one of {Resampler.METHODS}.")
+        if high_cardinality_encoding and not fit_on_train:
+            raise ValueError("high_cardinality_encoding requires fit_on_train, which fits the encoders on the training split.")
+        self.feature_store = self._create_feature_store()
         
         # Save the test parameters to JSON
         self.save_test_params()
@@ -75,7 +153,21 @@ class StrategyTester:
             "model_params": self.model_params,
             "evaluation_file": self.evaluation_file,
             "smote": self.apply_smote,
-            "smote_sampling": self.smote_sampling
+            "smote_sampling": self.smote_sampling,
+            "n_jobs": self.n_jobs,
+            "feature_store_dir": self.feature_store_dir,
+            "store_scaled": self.store_scaled,
+            "compact_dtypes": self.compact_dtypes,
+            "fit_on_train": self.fit_on_train,
+            "sparse_encoding": self.sparse_encoding,
+            "high_cardinality_encoding": self.high_cardinality_encoding,
+            "cv_folds": self.cv_folds,
+            "cv_mode": self.cv_mode,
+            "resampling": self.resampling,
+            "resampling_subsample": self.resampling_subsample,
+            "measure_resampling_memory": self.measure_resampling_memory,
+            "native_categorical": self.native_categorical,
+            "categorical_columns": self.categorical_columns
         }
 
         with open(params_file, 'w') as f:
@@ -84,29 +176,250 @@ class StrategyTester:
 
     def run(self):
         """Runs the testing pipeline for each strategy."""
+        # Load, parse and sort the data once and share derived columns between strategies
+        feature_cache = self._create_feature_cache(self.get_strategies())
+
+        if self.n_jobs > 1:
+            self._run_parallel(feature_cache)
+            return
+
         for strategy_name in self.get_strategies():
-            self.logger.info(f"Testing strategy: {strategy_name}")
-            # Initialize and extract features using the strategy
-            fe = create_feature_extractor(strategy_name, self.data_path)
-            extracted_df = fe.extract_features()
-            
+            self.run_strategy(strategy_name, feature_cache)
+
+    def _create_feature_cache(self, strategies):
+        """
+        Creates the shared feature cache, reading only what the pandas strategies declare.
+
+        The cache loads the union of the strategies' COLUMNS and the widest of their DATE_RANGE
+        values. A strategy without a declaration needs every column or every row.
+        """
+        columns, starts, ends = set(), [], []
+        for strategy_name in strategies:
+            strategy_module = FeatureExtractor.load_strategy_module(strategy_name)
+            if getattr(strategy_module, 'BACKEND', 'pandas') != 'pandas':
+                continue  # Other backends read the data file themselves
+            strategy_columns = getattr(strategy_module, 'COLUMNS', None)
+            columns = None if columns is None or strategy_columns is None else columns | set(strategy_columns)
+            start, end = getattr(strategy_module, 'DATE_RANGE', None) or (None, None)
+            starts.append(start)
+            ends.append(end)
+
+        columns = [self.target_col, *sorted(columns)] if columns is not None else None
+        start = None if not starts or None in starts else min(pd.Timestamp(date) for date in starts)
+        end = None if not ends or None in ends else max(pd.Timestamp(date) for date in ends)
+        date_range = None if start is None and end is None else (start, end)
+        return FeatureCache(data_path=self.data_path, datetime_col=self.datetime_col, columns=columns, date_range=date_range)
+
+    def run_strategy(self, strategy_name, feature_cache=None):
+        """Runs feature extraction, scaling, splitting, training and evaluation for one strategy."""
+        self.logger.info(f"Testing strategy: {strategy_name}")
+        if self.cv_folds:
+            self._run_cross_validation(strategy_name, self._prepare_features(strategy_name, feature_cache))
+            return
+
+        scaled_encoded_df = None
+        if self.feature_store is not None and self.store_scaled:
+            scaled_key = self.feature_store.key(strategy_name, self.data_path, stage="scaled",
+                                                extra={"scaler": repr(self.scaler), "target_col": self.target_col,
+                                                       "compact_dtypes": self.compact_dtypes,
+                                                       "fit_on_train": self.fit_on_train and self.split_date,
+                                                       "sparse_encoding": self.sparse_encoding,
+                                                       "high_cardinality_encoding": self.high_cardinality_encoding,
+                                                       "native_categorical": self.native_categorical,
+                                                       "categorical_columns": self.categorical_columns})
+            scaled_encoded_df = self.feature_store.load(scaled_key)
+
+        if scaled_encoded_df is None:
+            extracted_df = self._prepare_features(strategy_name, feature_cache)
+
             # Scale and encode data
-            se = ScaleEncode(data=extracted_df, scaler=self.scaler)
-            scaled_encoded_df = se.scale_and_encode(target_col=self.target_col)
+            if self.fit_on_train:
+                scaled_encoded_df = self._fit_scale_encode(strategy_name, extracted_df)
+            else:
+                se = ScaleEncode(data=extracted_df, scaler=self.scaler, sparse=self.sparse_encoding,
+                                 **self._categorical_options())
+                scaled_encoded_df = se.scale_and_encode(target_col=self.target_col)
+            if self.feature_store is not None and self.store_scaled:
+                self.feature_store.save(scaled_key, scaled_encoded_df)
+
+        # Separate features (X) and target (y)
+        X = scaled_encoded_df.drop(columns=[self.target_col])
+        y = scaled_encoded_df[self.target_col]
+
+        # Split the data into training and testing sets
+        X_train, X_test, y_train, y_test = self.preprocessor.split_by_date(
+            X, y, self.split_date, datetime_col=self.datetime_col
+        )
+        X_train, y_train, sample_weight = self._resample(X_train, y_train)
+
+        # Initialize and train the model
+        model = useModel(model_type=self.model_type, params=self.model_params)
+        model.train(X_train, y_train, self.num_rounds, sample_weight=sample_weight)
+        model.save(f"tests/{self.test_name}/{strategy_name}_model.joblib")
+
+        # Make predictions and evaluate
+        y_pred_proba = model.predict_proba(X_test)
+        y_pred = model.to_labels(y_pred_proba)
+        model.evaluate(y_test, y_pred, file_path=self.evaluation_file, data_label=f"{strategy_name}_test",
+                       lock=self.evaluation_lock, y_pred_proba=y_pred_proba)
+
+    def _run_cross_validation(self, strategy_name, extracted_df):
+        """
+        Evaluates a strategy on walk-forward folds and reports the mean and spread of each metric.
+
+        The features are sorted by date once and every fold is a pair of position ranges over
+        that frame. Folds run concurrently in threads, so they share the sorted frame, and each
+        fold fits its own scaling and encoding on its training rows. The metrics of every fold
+        and their mean and standard deviation are appended to the evaluation file.
+        """
+        df = extracted_df.sort_values(self.datetime_col, kind='stable')
+        folds = self.preprocessor.walk_forward_folds(df[self.datetime_col], self.split_date, self.cv_folds, self.cv_mode)
+
+        with ThreadPoolExecutor(max_workers=self.cv_jobs or len(folds)) as executor:
+            fold_metrics = list(executor.map(lambda fold: self._run_fold(strategy_name, df, fold, *folds[fold]), range(len(folds))))
+
+        for fold, metrics in enumerate(fold_metrics):
+            useModel.write_metrics(metrics, self.evaluation_file, f"{strategy_name}_fold{fold}", lock=self.evaluation_lock)
+        values = np.array([[metrics[column] for column in useModel.METRIC_COLUMNS] for metrics in fold_metrics])
+        mean = dict(zip(useModel.METRIC_COLUMNS, values.mean(axis=0)))
+        std = dict(zip(useModel.METRIC_COLUMNS, values.std(axis=0, ddof=1) if len(values) > 1 else np.zeros(values.shape[1])))
+        useModel.write_metrics(mean, self.evaluation_file, f"{strategy_name}_cv_mean", lock=self.evaluation_lock)
+        useModel.write_metrics(std, self.evaluation_file, f"{strategy_name}_cv_std", lock=self.evaluation_lock)
+        self.logger.info("Cross-validated %s on %d folds: f1_score_1 %.4f +/- %.4f",
+                         strategy_name, len(folds), mean['f1_score_1'], std['f1_score_1'])
+
+    def _run_fold(self, strategy_name, df, fold, train, test):
+        """Scales, trains and evaluates one walk-forward fold, writing its threshold sweep and returning its metrics."""
+        se = ScaleEncode(data=df.iloc[train], scaler=self.scaler, sparse=self.sparse_encoding,
+                         high_cardinality=self.high_cardinality_encoding, **self._categorical_options())
+        train_df = se.fit_transform(target_col=self.target_col)
+        test_df = se.transform(df.iloc[test])
+
+        X_train = train_df.drop(columns=[self.target_col, self.datetime_col])
+        y_train = train_df[self.target_col]
+        X_train, y_train, sample_weight = self._resample(X_train, y_train)
+
+        model = useModel(model_type=self.model_type, params=self.model_params)
+        model.train(X_train, y_train, self.num_rounds, sample_weight=sample_weight)
+        y_pred_proba = model.predict_proba(test_df.drop(columns=[self.target_col, self.datetime_col]))
+        metrics = model.metrics(test_df[self.target_col], model.to_labels(y_pred_proba))
+        summary, curve = ThresholdEvaluator().evaluate(test_df[self.target_col], y_pred_proba)
+        model.write_ranking({**metrics, **summary}, curve, os.path.join(os.path.dirname(self.evaluation_file), "ranking"),
+                            f"{strategy_name}_fold{fold}")
+        return metrics
+
+    def _resample(self, X_train, y_train):
+        """Applies the configured class-imbalance handling to the training rows, returning their sample weights."""
+        if not self.resampling:
+            return X_train, y_train, None
+        return self.preprocessor.resample(X_train, y_train, self.resampling, self.smote_sampling, self.resampling_subsample,
+                                          measure_memory=self.measure_resampling_memory)
+
+    def _categorical_options(self):
+        """Returns the ScaleEncode options of the native categorical mode."""
+        return {"native_categorical": self.native_categorical, "categorical_columns": self.categorical_columns}
+
+    def _prepare_features(self, strategy_name, feature_cache=None):
+        """Extracts the features of a strategy and compacts their types if enabled."""
+        extracted_df = self._extract_features(strategy_name, feature_cache)
+        if self.compact_dtypes:
+            extracted_df = DtypeOptimizer().optimize(extracted_df)
+        return extracted_df
+
+    def _fit_scale_encode(self, strategy_name, extracted_df):
+        """
+        Fits the scaling and encoding on the rows before the split date and applies it to all rows.
+
+        The training rows are transformed by fit_transform, so target-encoded columns are
+        out-of-fold for them, and are returned before the test rows so the date split can
+        slice them without copying. The fitted state is saved to
+        tests/<test_name>/<strategy_name>_scale_encode.joblib so later batches can be transformed
+        without refitting.
+        """
+        is_train = pd.to_datetime(extracted_df[self.datetime_col]) < pd.Timestamp(self.split_date)
+        se = ScaleEncode(data=extracted_df[is_train], scaler=self.scaler, sparse=self.sparse_encoding,
+                         high_cardinality=self.high_cardinality_encoding, **self._categorical_options())
+        train_df = se.fit_transform(target_col=self.target_col)
+        se.save(f"tests/{self.test_name}/{strategy_name}_scale_encode.joblib")
+        return pd.concat([train_df, se.transform(extracted_df[~is_train])])
+
+    def _extract_features(self, strategy_name, feature_cache=None):
+        """Extracts the features of a strategy, reusing them from the feature store when possible."""
+        if self.feature_store is not None:
+            key = self.feature_store.key(strategy_name, self.data_path, stage="features")
+            extracted_df = self.feature_store.load(key)
+            if extracted_df is not None:
+                return extracted_df
+
+        # Initialize and extract features using the strategy
+        fe = create_feature_extractor(strategy_name, self.data_path, feature_cache=feature_cache)
+        extracted_df = fe.extract_features()
+        if self.feature_store is not None:
+            self.feature_store.save(key, extracted_df)
+        return extracted_df
+
+    def _create_feature_store(self):
+        if not self.feature_store_dir:
+            return None
+        return FeatureStore(self.feature_store_dir, max_bytes=self.feature_store_max_bytes)
+
+    def _run_parallel(self, feature_cache):
+        """
+        Runs the strategies on a pool of worker processes.
+
+        The base frame is written once to a memory-mapped Arrow file that every worker reads,
+        worker logs are forwarded to the main process, and evaluation rows are appended under a shared lock.
+        """
+        strategies = self.get_strategies()
+        shared_path = os.path.join("tests", self.test_name, "base_frame.arrow")
+        feature_cache.to_arrow(shared_path)
+
+        # Spawned workers behave the same on every platform and start without inherited log handlers
+        context = multiprocessing.get_context("spawn")
+        log_queue = context.Queue()
+        listener = Logger().listen(log_queue)
+        evaluation_lock = context.Lock()
+        self.logger.info("Running %d strategies on %d worker processes.", len(strategies), self.n_jobs)
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(self.n_jobs, len(strategies)),
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.test_name, log_queue, evaluation_lock, shared_path, self.datetime_col),
+            ) as pool:
+                futures = {pool.submit(_run_worker_strategy, self, strategy_name): strategy_name for strategy_name in strategies}
+                for future in as_completed(futures):
+                    future.result()
+                    self.logger.info("Strategy %s finished.", futures[future])
+        finally:
+            listener.stop()
+            os.remove(shared_path)
+
+    def __getstate__(self):
+        # Loggers, the preprocessor and the feature store are recreated in the worker process
+        state = self.__dict__.copy()
+        del state["logger"], state["preprocessor"], state["feature_store"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = Logger().get_logger(self.__class__.__name__)
+        self.preprocessor = Preprocessor()
+        self.feature_store = self._create_feature_store()
+
+
+_worker_feature_cache = None  # Feature cache of the current worker process
 
-            # Separate features (X) and target (y)
-            X = scaled_encoded_df.drop(columns=[self.target_col])
-            y = scaled_encoded_df[self.target_col]
 
-            # Split the data into training and testing sets
-            X_train, X_test, y_train, y_test = self.preprocessor.split_by_date(
-                X, y, self.split_date, datetime_col=self.datetime_col, smote=self.apply_smote, sampling_strategy=self.smote_sampling
-            )
+def _init_worker(test_name, log_queue, evaluation_lock, shared_path, datetime_col):
+    """Prepares a worker process: queued logging, the shared lock and the memory-mapped base frame."""
+    global _worker_feature_cache
+    Logger.use_queue(log_queue)
+    Logger(test_name)
+    StrategyTester.evaluation_lock = evaluation_lock
+    _worker_feature_cache = FeatureCache.from_arrow(shared_path, datetime_col=datetime_col)
 
-            # Initialize and train the model
-            model = useModel(model_type=self.model_type, params=self.model_params)
-            model.train(X_train, y_train, self.num_rounds)
 
-            # Make predictions and evaluate
-            y_pred = model.predict(X_test)
-            model.evaluate(y_test, y_pred, file_path=self.evaluation_file, data_label=f"{strategy_name}_test")
+def _run_worker_strategy(tester, strategy_name):
+    tester.run_strategy(strategy_name, _worker_feature_cache)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+
+class ThresholdEvaluator:
+    def __init__(self, precision_targets=(0.5, 0.8, 0.9)):
+        """
+        Initialize the ThresholdEvaluator class.
+
+        Evaluates fraud probabilities at every threshold at once: the rows are sorted by
+        score a single time and the confusion counts of every distinct threshold are the
+        cumulative sums over that order, so the PR and ROC curves, their areas, the recall at
+        fixed precisions and the best-F1 threshold all come from one O(n log n) pass.
+        A row is predicted positive when its score is at or above the threshold.
+
+        Parameters:
+        - precision_targets (tuple): Precisions at which the best achievable recall is reported.
+        """
+        self.precision_targets = tuple(precision_targets)
+
+    def evaluate(self, y_true, y_score):
+        """
+        Computes the threshold curve and the ranking metrics of a set of scores.
+
+        Parameters:
+        - y_true (array-like): Binary labels.
+        - y_score (array-like): Probabilities of the positive class.
+
+        Returns:
+        - dict: Summary metrics (roc_auc, pr_auc, best_f1 and its threshold, precision and
+          recall, recall_at_precision_<p> for every target precision).
+        - pd.DataFrame: Curve with threshold, precision, recall, fpr and f1 columns, one row
+          per distinct score from the highest to the lowest.
+        """
+        labels = np.asarray(y_true).astype(bool)
+        scores = np.asarray(y_score, dtype=np.float64)
+        if labels.shape != scores.shape:
+            raise ValueError("y_true and y_score must have the same length.")
+
+        # One sort, then the counts at each distinct threshold are cumulative sums
+        order = np.argsort(-scores, kind='stable')
+        scores, labels = scores[order], labels[order]
+        last = np.r_[np.flatnonzero(np.diff(scores)), len(scores) - 1] if len(scores) else np.array([], dtype=int)
+        tp = np.cumsum(labels)[last].astype(np.float64)
+        fp = (last + 1) - tp
+        positives, negatives = (tp[-1], fp[-1]) if len(last) else (0.0, 0.0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            precision = tp / (tp + fp)
+            recall = tp / positives if positives else np.full(len(tp), np.nan)
+            fpr = fp / negatives if negatives else np.full(len(fp), np.nan)
+            f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+        curve = pd.DataFrame({'threshold': scores[last], 'precision': precision, 'recall': recall,
+                              'fpr': fpr, 'f1': f1})
+
+        summary = {'rows': len(scores), 'positives': int(positives)}
+        if positives and negatives:
+            # Trapezoids between consecutive points of the ROC curve, from (0, 0)
+            tpr, fpr_steps = np.r_[0.0, recall], np.diff(np.r_[0.0, fpr])
+            summary['roc_auc'] = float(np.sum(fpr_steps * (tpr[1:] + tpr[:-1]) / 2))
+        else:
+            summary['roc_auc'] = np.nan  # Undefined with a single class
+        # Average precision: precision weighted by the recall gained at each threshold
+        summary['pr_auc'] = float(np.sum(np.diff(np.r_[0.0, recall]) * precision)) if positives else np.nan
+
+        best = int(np.argmax(f1)) if len(f1) else None
+        summary['best_f1'] = float(f1[best]) if best is not None else np.nan
+        summary['best_f1_threshold'] = float(curve['threshold'].iat[best]) if best is not None else np.nan
+        summary['best_f1_precision'] = float(precision[best]) if best is not None else np.nan
+        summary['best_f1_recall'] = float(recall[best]) if best is not None else np.nan
+        for target in self.precision_targets:
+            reached = precision >= target
+            summary[f'recall_at_precision_{target:g}'] = float(recall[reached].max()) if positives and reached.any() else 0.0
+        return summary, curve
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+
+class TimeWindowVelocity:
+    STATS = ('count', 'sum', 'mean')
+
+    def __init__(self, groups, timestamps, resolution='1s'):
+        """
+        Initialize the TimeWindowVelocity class.
+
+        Computes time-based (not row-based) rolling counts and sums per group, such as the
+        number of transactions of a user in the last 24 hours. Window starts are found with
+        one searchsorted call per window over the sorted timestamps, so many windows are
+        computed in a single pass with memory linear in the number of rows.
+
+        Parameters:
+        - groups (array-like): Group key of every row. Rows of the same group must be contiguous.
+        - timestamps (array-like): Datetime of every row, ascending within each group.
+        - resolution (str): Time unit the timestamps and windows are truncated to.
+        """
+        groups = np.asarray(groups)
+        self.size = len(groups)
+        self.missing = np.asarray(pd.isna(timestamps))
+
+        self.resolution = pd.Timedelta(resolution).value
+        ticks = np.asarray(timestamps, dtype='datetime64[ns]').view(np.int64) // self.resolution
+        if self.missing.any():
+            # Missing timestamps sort last within a group, keep the key monotonic and mask them later
+            ticks[self.missing] = ticks[~self.missing].max() if (~self.missing).any() else 0
+
+        # Offset every group past the previous one so a single sorted key covers all groups
+        boundaries = np.flatnonzero(groups[1:] != groups[:-1]) + 1
+        group_id = np.zeros(self.size, dtype=np.int64)
+        group_id[boundaries] = 1
+        group_id = np.cumsum(group_id)
+        self.origin = ticks.min() if self.size else 0
+        self.ticks = ticks - self.origin
+        self.group_id = group_id
+
+    def compute(self, values=None, windows=('1h', '24h', '7D', '30D'), stats=('count', 'sum')):
+        """
+        Computes time-window statistics for several windows in one call.
+
+        The window of a row covers the rows of the same group within (t - window, t] up to
+        and including the row itself, matching pandas `rolling(window)` on a datetime index.
+        'count' is the number of transactions in the window, while 'sum' and 'mean' skip NaN values.
+
+        Parameters:
+        - values (array-like): Values to sum, e.g. transaction amounts (only needed for 'sum' and 'mean').
+        - windows (list): Window lengths as pandas offset strings or Timedeltas.
+        - stats (list): Statistics to compute, any of TimeWindowVelocity.STATS.
+
+        Returns:
+        - dict: Mapping of (stat, window) to a float64 NumPy array.
+        """
+        unknown = set(stats) - set(self.STATS)
+        if unknown:
+            raise ValueError(f"Unsupported velocity statistics: {sorted(unknown)}")
+
+        spans = {window: pd.Timedelta(window).value // self.resolution for window in windows}
+        stride = (int(self.ticks.max()) if self.size else 0) + max(spans.values(), default=0) + 1
+        if self.size and int(self.group_id[-1]) * stride > np.iinfo(np.int64).max - stride:
+            raise OverflowError("Time range too large to build a single sorted key for all groups.")
+        key = self.group_id * stride + self.ticks
+
+        sum_cumsum = None
+        if set(stats) & {'sum', 'mean'}:
+            if values is None:
+                raise ValueError("Values are required to compute 'sum' or 'mean'.")
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            valid = ~np.isnan(values)
+            sum_cumsum = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+            valid_cumsum = np.concatenate(([0], np.cumsum(valid)))
+
+        rows = np.arange(self.size)
+        results = {}
+        for window, span in spans.items():
+            start = np.searchsorted(key, key - span, side='right')
+            count = (rows + 1 - start).astype(np.float64)
+            window_stats = {'count': count}
+            if sum_cumsum is not None:
+                valid_count = valid_cumsum[rows + 1] - valid_cumsum[start]
+                window_sum = sum_cumsum[rows + 1] - sum_cumsum[start]
+                window_stats['sum'] = np.where(valid_count > 0, window_sum, np.nan)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    window_stats['mean'] = window_stats['sum'] / valid_count
+            for stat in stats:
+                result = window_stats[stat]
+                result[self.missing] = np.nan
+                results[(stat, window)] = result
+
+        return results
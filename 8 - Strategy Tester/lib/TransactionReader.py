@@ -0,0 +1,68 @@
+import pandas as pd
+import pyarrow.dataset as ds
+
+
+def read_transactions(data_path, columns=None, date_range=None, datetime_col='Datetime'):
+    """
+    Reads the transactions parquet file, loading only the requested columns and rows.
+
+    Columns are projected and the date range is pushed down as a pyarrow dataset filter,
+    so row groups whose statistics fall outside the range are skipped without being read.
+
+    Parameters:
+    - data_path (str): Path to the parquet file.
+    - columns (list, optional): Columns to read. All columns are read if not provided.
+    - date_range (tuple, optional): (start, end) dates, start inclusive and end exclusive;
+      either side can be None for an open range.
+    - datetime_col (str): Column the date range applies to.
+
+    Returns:
+    - pd.DataFrame: Loaded DataFrame.
+    """
+    dataset = ds.dataset(data_path, format='parquet')
+    table = dataset.to_table(columns=columns, filter=date_filter(datetime_col, date_range))
+    return table.to_pandas()
+
+
+def date_filter(datetime_col, date_range):
+    """
+    Builds a pyarrow filter expression for a date range.
+
+    Parameters:
+    - datetime_col (str): Column the date range applies to.
+    - date_range (tuple, optional): (start, end) dates, start inclusive and end exclusive.
+
+    Returns:
+    - pyarrow.dataset.Expression or None: Filter expression, None if the range is open on both sides.
+    """
+    if date_range is None:
+        return None
+
+    start, end = date_range
+    expression = None
+    if start is not None:
+        expression = ds.field(datetime_col) >= pd.Timestamp(start).to_pydatetime()
+    if end is not None:
+        upper = ds.field(datetime_col) < pd.Timestamp(end).to_pydatetime()
+        expression = upper if expression is None else expression & upper
+    return expression
+
+
+def date_mask(datetimes, date_range):
+    """
+    Returns the boolean mask of a date range for an in-memory datetime column.
+
+    Parameters:
+    - datetimes (pd.Series): Datetime column.
+    - date_range (tuple, optional): (start, end) dates, start inclusive and end exclusive.
+
+    Returns:
+    - pd.Series: True for rows inside the range.
+    """
+    start, end = date_range if date_range is not None else (None, None)
+    mask = pd.Series(True, index=datetimes.index)
+    if start is not None:
+        mask &= datetimes >= pd.Timestamp(start)
+    if end is not None:
+        mask &= datetimes < pd.Timestamp(end)
+    return mask
@@ -1,11 +1,21 @@
 import os
+import time
+from contextlib import nullcontext
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 import xgboost as xgb
-from catboost import CatBoostClassifier
+from catboost import CatBoostClassifier, Pool
 from sklearn.metrics import classification_report
 from lib.Logger import Logger
+from lib.ThresholdEvaluator import ThresholdEvaluator
+from lib.ParquetBatchIter import ParquetBatchIter
 
 
 class useModel:
+    METRIC_COLUMNS = ('precision_0', 'recall_0', 'f1_score_0', 'precision_1', 'recall_1', 'f1_score_1')
+
     def __init__(self, model_type='XGBoost', params=None):
         """
         Initializes the useModel class for a specified model type.
@@ -17,6 +27,7 @@ class useModel:
         self.logger = Logger().get_logger(self.__class__.__name__)
         self.model_type = model_type
         self.model_strategy = self._set_model_strategy(params)
+        self.feature_names = None
         self.logger.info("useModel initialized for %s.", model_type)
 
     def _set_model_strategy(self, params):
@@ -27,40 +38,227 @@ class useModel:
         else:
             raise ValueError("Unsupported model type: choose 'XGBoost' or 'CatBoost'.")
 
-    def train(self, X_train, y_train, num_rounds=100):
-        self.model_strategy.train(X_train, y_train, num_rounds)
+    def train(self, X_train, y_train, num_rounds=100, sample_weight=None):
+        self.feature_names = list(X_train.columns) if isinstance(X_train, pd.DataFrame) else None
+        self.model_strategy.train(X_train, y_train, num_rounds, sample_weight=sample_weight)
+
+    def train_from_parquet(self, data_path, target_col, num_rounds=100, feature_names=None, weight_col=None,
+                           date_range=None, datetime_col="Datetime", batch_size=500_000, categories=None, cache_dir=None):
+        """
+        Trains on a scaled and encoded parquet file read in batches, without loading it as a DataFrame.
+
+        XGBoost only: the batches are quantized into a QuantileDMatrix (an ExtMemQuantileDMatrix
+        cached on local disk with cache_dir, or an external-memory DMatrix before XGBoost 3.0),
+        so peak memory is one batch plus the quantized matrix, or one batch plus a page with
+        external memory. Requires the 'hist' tree method.
+
+        Parameters:
+        - data_path (str): Parquet file of scaled and encoded features, e.g. from ScaleEncode.transform_stream.
+        - target_col (str): Target column.
+        - num_rounds (int): Number of boosting rounds.
+        - feature_names (list, optional): Feature columns (all but target, datetime and weight if not provided).
+        - weight_col (str, optional): Column of sample weights.
+        - date_range (tuple, optional): (start, end) dates of the training rows, e.g. (None, split_date).
+        - datetime_col (str): Datetime column, excluded from the features.
+        - batch_size (int): Number of rows per batch.
+        - categories (dict, optional): Categories of the native categorical columns, see ParquetBatchIter.
+        - cache_dir (str, optional): Directory of the external-memory cache (None keeps the matrix in memory).
+        """
+        if self.model_type != 'XGBoost':
+            raise ValueError("Training from parquet batches is only supported for XGBoost.")
+        start = time.perf_counter()
+        batches = ParquetBatchIter(data_path, target_col, feature_names=feature_names, weight_col=weight_col,
+                                   date_range=date_range, datetime_col=datetime_col, batch_size=batch_size,
+                                   categories=categories, cache_dir=cache_dir)
+        self.feature_names = batches.feature_names
+        self.model_strategy.train_from_batches(batches, num_rounds)
+        self.logger.info("Trained on %d rows of %s in batches of %d (%s) in %.1f s.", batches.rows, data_path, batch_size,
+                         f"external memory in {cache_dir}" if cache_dir else "in memory", time.perf_counter() - start)
+
+    def save(self, path):
+        """
+        Saves the trained model together with its type, parameters and training feature list.
+
+        Parameters:
+        - path (str): Path of the artifact to write.
+        """
+        if self.model_strategy.model is None:
+            raise ValueError("The model must be trained before it can be saved.")
+        joblib.dump({'model_type': self.model_type, 'params': self.model_strategy.params,
+                     'model': self.model_strategy.model, 'feature_names': self.feature_names}, path)
+        self.logger.info("Model saved to %s.", path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Creates a useModel from a trained model saved by save().
+
+        Parameters:
+        - path (str): Path of the saved artifact.
+
+        Returns:
+        - useModel: Instance ready for predict() and predict_proba().
+        """
+        artifact = joblib.load(path)
+        instance = cls(model_type=artifact['model_type'], params=artifact['params'])
+        instance.model_strategy.model = artifact['model']
+        instance.feature_names = artifact['feature_names']
+        instance.logger.info("Model loaded from %s.", path)
+        return instance
+
+    def predict(self, X_test, threshold=0.5):
+        return self.model_strategy.predict(X_test, threshold)
+
+    def predict_proba(self, X_test):
+        """
+        Predicts the fraud probability of every row.
+
+        The probabilities can be thresholded with to_labels() at any number of thresholds
+        without running inference again.
 
-    def predict(self, X_test):
-        return self.model_strategy.predict(X_test)
+        Parameters:
+        - X_test (pd.DataFrame): Test data features.
+
+        Returns:
+        - np.ndarray: Probabilities of the positive class.
+        """
+        return self.model_strategy.predict_proba(X_test)
+
+    @staticmethod
+    def to_labels(y_pred_proba, threshold=0.5):
+        """
+        Converts probabilities to binary class labels in one vectorized comparison.
+
+        Parameters:
+        - y_pred_proba (np.ndarray): Probabilities of the positive class.
+        - threshold (float): Probability above which a row is labelled 1.
+
+        Returns:
+        - np.ndarray: Binary predictions (int8).
+        """
+        return (np.asarray(y_pred_proba) > threshold).astype(np.int8)
 
-    def evaluate(self, y_test, y_pred, file_path, data_label):
+    def evaluate(self, y_test, y_pred, file_path, data_label, lock=None, y_pred_proba=None):
+        """
+        Appends the metrics of the predictions to the evaluation file.
+
+        With the probabilities, also runs the threshold sweep (PR and ROC curves, ROC-AUC,
+        PR-AUC, recall at fixed precisions, best-F1 threshold) and writes it as Parquet tables
+        next to the evaluation file, see write_ranking().
+
+        Parameters:
+        - y_test (array-like): True labels.
+        - y_pred (array-like): Binary predictions.
+        - file_path (str): Path of the evaluation CSV file.
+        - data_label (str): Label of the evaluation, e.g. '<strategy>_test'.
+        - lock (multiprocessing.Lock, optional): Lock shared by parallel workers.
+        - y_pred_proba (np.ndarray, optional): Probabilities of the positive class.
+        """
         self.logger.info("Evaluating model.")
-        
+        metrics = self.metrics(y_test, y_pred)
+        self.write_metrics(metrics, file_path, data_label, lock)
+        if y_pred_proba is not None:
+            summary, curve = ThresholdEvaluator().evaluate(y_test, y_pred_proba)
+            self.logger.info("%s: ROC-AUC %.4f, PR-AUC %.4f, best F1 %.4f at threshold %.4f", data_label,
+                             summary['roc_auc'], summary['pr_auc'], summary['best_f1'], summary['best_f1_threshold'])
+            self.write_ranking({**metrics, **summary}, curve, os.path.join(os.path.dirname(file_path), "ranking"), data_label)
+
+    @staticmethod
+    def metrics(y_test, y_pred):
+        """
+        Computes precision, recall and F1 score of both classes.
+
+        Returns:
+        - dict: Metrics keyed by the evaluation file column names.
+        """
         # Generate classification report as a dictionary
-        report = classification_report(y_test, y_pred, output_dict=True)
+        report = classification_report(y_test, y_pred, labels=[0, 1], output_dict=True, zero_division=0)
 
         # Extract metrics for both classes '0' and '1'
-        precision_0 = report['0']['precision']
-        recall_0 = report['0']['recall']
-        f1_score_0 = report['0']['f1-score']
-        precision_1 = report['1']['precision']
-        recall_1 = report['1']['recall']
-        f1_score_1 = report['1']['f1-score']
+        return {
+            'precision_0': report['0']['precision'],
+            'recall_0': report['0']['recall'],
+            'f1_score_0': report['0']['f1-score'],
+            'precision_1': report['1']['precision'],
+            'recall_1': report['1']['recall'],
+            'f1_score_1': report['1']['f1-score'],
+        }
+
+    @classmethod
+    def write_metrics(cls, metrics, file_path, data_label, lock=None):
+        """
+        Appends one line of metrics to the evaluation file, writing the header first if needed.
 
+        Parameters:
+        - metrics (dict): Metrics returned by metrics().
+        - file_path (str): Path of the evaluation CSV file.
+        - data_label (str): Label of the line, e.g. '<strategy>_test'.
+        - lock (multiprocessing.Lock, optional): Lock shared by parallel workers.
+        """
         # Prepare the data line for writing
-        data_line = f"{data_label},{precision_0},{recall_0},{f1_score_0},{precision_1},{recall_1},{f1_score_1}"
+        data_line = ",".join([data_label, *(str(metrics[column]) for column in cls.METRIC_COLUMNS)])
+
+        # Hold the lock shared by parallel workers while checking and appending to the file
+        with lock or nullcontext():
+            # Write header if the file does not exist
+            header = ",".join(["data_label", *cls.METRIC_COLUMNS])
+            if not os.path.exists(file_path):
+                with open(file_path, 'w') as f:
+                    f.write(header + "\n")
+
+            # Append data line to the file
+            with open(file_path, 'a') as f:
+                f.write(data_line + "\n")
+        Logger().get_logger(cls.__name__).info("Evaluation results saved to %s.", file_path)
+
+    @classmethod
+    def write_ranking(cls, summary, curve, directory, data_label):
+        """
+        Writes a threshold sweep as Parquet tables, one file per evaluation.
+
+        The summary goes to <directory>/summary/<data_label>.parquet (one row) and the curve
+        to <directory>/curves/<data_label>.parquet, both with a data_label column, so each
+        directory can be read as one table with pd.read_parquet(). Every evaluation writes
+        its own files, so parallel workers need no lock.
+
+        Parameters:
+        - summary (dict): Metrics of the evaluation.
+        - curve (pd.DataFrame): Threshold curve returned by ThresholdEvaluator.evaluate().
+        - directory (str): Directory of the ranking tables.
+        - data_label (str): Label of the evaluation, e.g. '<strategy>_test'.
+        """
+        for table, frame in (("summary", pd.DataFrame([summary])), ("curves", curve)):
+            os.makedirs(os.path.join(directory, table), exist_ok=True)
+            frame = frame.copy(deep=False)
+            frame.insert(0, "data_label", data_label)
+            frame.to_parquet(os.path.join(directory, table, f"{data_label}.parquet"), index=False)
+        Logger().get_logger(cls.__name__).info("Threshold sweep saved to %s.", directory)
+
+
 
-        # Write header if the file does not exist
-        header = "data_label,precision_0,recall_0,f1_score_0,precision_1,recall_1,f1_score_1"
-        if not os.path.exists(file_path):
-            with open(file_path, 'w') as f:
-                f.write(header + "\n")
+def to_model_input(X):
+    """
+    Converts a feature DataFrame with sparse one-hot columns to a CSR matrix.
 
-        # Append data line to the file
-        with open(file_path, 'a') as f:
-            f.write(data_line + "\n")
-        self.logger.info("Evaluation results saved to %s.", file_path)
+    XGBoost and scikit-learn densify pandas sparse columns, so frames encoded with sparse
+    output are passed to the models as one CSR matrix with the dense columns first.
 
+    Parameters:
+    - X (pd.DataFrame): Feature DataFrame.
+
+    Returns:
+    - tuple: The CSR matrix and its feature names, or X and None if it has no sparse columns.
+    """
+    if not isinstance(X, pd.DataFrame):
+        return X, None
+    sparse_columns = [col for col in X.columns if isinstance(X[col].dtype, pd.SparseDtype)]
+    if not sparse_columns:
+        return X, None
+
+    dense_columns = [col for col in X.columns if col not in set(sparse_columns)]
+    dense = sp.csr_matrix(X[dense_columns].to_numpy(dtype=np.float32))
+    sparse = X[sparse_columns].sparse.to_coo().astype(np.float32)
+    return sp.hstack([dense, sparse], format='csr'), [str(col) for col in dense_columns + sparse_columns]
 
 
 class XGBoostStrategy:
@@ -71,13 +269,45 @@ class XGBoostStrategy:
         self.params = params or {'objective': 'binary:logistic'}
         self.model = None
 
-    def train(self, X_train, y_train, num_boost_round=100):
+    def train(self, X_train, y_train, num_boost_round=100, sample_weight=None):
+        """
+        Trains the XGBoost model, weighting the training rows by sample_weight if given.
+
+        Pandas 'category' columns are split on natively (enable_categorical) instead of
+        needing one-hot columns. With the 'hist' tree method (the default) the frame is
+        quantized straight into a QuantileDMatrix, which trains the same model as a DMatrix
+        without holding a float copy of the frame.
+        """
+        X_train, feature_names = to_model_input(X_train)
+        if self._uses_hist():
+            dtrain = xgb.QuantileDMatrix(X_train, label=y_train, weight=sample_weight, feature_names=feature_names,
+                                         max_bin=self.params.get('max_bin'), enable_categorical=True)
+        else:
+            dtrain = xgb.DMatrix(X_train, label=y_train, weight=sample_weight, feature_names=feature_names,
+                                 enable_categorical=True)
+        self.model = xgb.train(self.params, dtrain, num_boost_round=num_boost_round)
+
+    def train_from_batches(self, batches, num_boost_round=100):
         """
-        Trains the XGBoost model.
+        Trains the XGBoost model on a ParquetBatchIter, quantizing the batches as they are read.
+
+        Parameters:
+        - batches (ParquetBatchIter): Batches of features, labels and weights.
+        - num_boost_round (int): Number of boosting rounds.
         """
-        dtrain = xgb.DMatrix(X_train, label=y_train)
+        if not self._uses_hist():
+            raise ValueError("Training from batches needs the 'hist' tree method.")
+        if batches.cache_dir and not hasattr(xgb, 'ExtMemQuantileDMatrix'):
+            # XGBoost 2.x: an external-memory DMatrix, quantized page by page by the 'hist' method
+            dtrain = xgb.DMatrix(batches, enable_categorical=True)
+        else:
+            matrix = xgb.ExtMemQuantileDMatrix if batches.cache_dir else xgb.QuantileDMatrix
+            dtrain = matrix(batches, max_bin=self.params.get('max_bin'), enable_categorical=True)
         self.model = xgb.train(self.params, dtrain, num_boost_round=num_boost_round)
 
+    def _uses_hist(self):
+        return self.params.get('tree_method', 'hist') in ('hist', 'auto')
+
     def predict(self, X_test, threshold=0.5):
         """
         Predicts using the trained XGBoost model and applies a threshold to convert
@@ -88,12 +318,23 @@ class XGBoostStrategy:
         - threshold (float): Probability threshold for binary classification.
 
         Returns:
-        - List[int]: Binary predictions.
+        - np.ndarray: Binary predictions (int8).
         """
-        dtest = xgb.DMatrix(X_test)
-        y_pred_proba = self.model.predict(dtest)
-        y_pred = [1 if prob > threshold else 0 for prob in y_pred_proba]
-        return y_pred
+        return useModel.to_labels(self.predict_proba(X_test), threshold)
+
+    def predict_proba(self, X_test):
+        """
+        Predicts the positive class probabilities with the trained XGBoost model.
+
+        Parameters:
+        - X_test (pd.DataFrame): Test data features.
+
+        Returns:
+        - np.ndarray: Probabilities of the positive class.
+        """
+        X_test, feature_names = to_model_input(X_test)
+        dtest = xgb.DMatrix(X_test, feature_names=feature_names, enable_categorical=True)
+        return self.model.predict(dtest)
 
 
 class CatBoostStrategy:
@@ -104,20 +345,49 @@ class CatBoostStrategy:
         self.params = params or {'iterations': 100}
         self.model = CatBoostClassifier(**self.params)
 
-    def train(self, X_train, y_train, iterations=100):
+    def train(self, X_train, y_train, iterations=100, sample_weight=None):
         """
-        Trains the CatBoost model.
+        Trains the CatBoost model, weighting the training rows by sample_weight if given.
+
+        Pandas 'category' columns are passed as CatBoost cat_features.
         """
-        self.model.fit(X_train, y_train)
+        self.model.fit(self._pool(X_train, y_train, sample_weight))
 
-    def predict(self, X_test):
+    def predict(self, X_test, threshold=0.5):
         """
         Predicts using the trained CatBoost model.
 
         Parameters:
         - X_test (pd.DataFrame): Test data features.
+        - threshold (float): Probability threshold for binary classification.
 
         Returns:
-        - List[int]: Binary predictions.
+        - np.ndarray: Binary predictions (int8).
+        """
+        return useModel.to_labels(self.predict_proba(X_test), threshold)
+
+    def predict_proba(self, X_test):
+        """
+        Predicts the positive class probabilities with the trained CatBoost model.
+
+        Parameters:
+        - X_test (pd.DataFrame): Test data features.
+
+        Returns:
+        - np.ndarray: Probabilities of the positive class.
+        """
+        return self.model.predict_proba(self._pool(X_test))[:, 1]
+
+    @staticmethod
+    def _pool(X, y=None, sample_weight=None):
+        """
+        Builds the CatBoost Pool of a feature set, declaring its 'category' columns as cat_features.
+
+        CatBoost reads categorical values as strings, so missing and unseen categories become 'nan'.
         """
-        return self.model.predict(X_test).tolist()
+        X = to_model_input(X)[0]
+        cat_features = [col for col in X.columns if isinstance(X[col].dtype, pd.CategoricalDtype)] \
+            if isinstance(X, pd.DataFrame) else []
+        if cat_features:
+            X = X.assign(**{col: X[col].astype(str).fillna('nan') for col in cat_features})
+        return Pool(X, label=y, weight=sample_weight, cat_features=cat_features or None)
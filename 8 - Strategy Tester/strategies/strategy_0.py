@@ -1,7 +1,15 @@
 import pandas as pd
 import numpy as np
+from lib.FeatureCache import FeatureCache
 
-def strategy(original_df: pd.DataFrame):
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Amount", "Use Chip", "Merchant Name", "MCC", "Errors?", "Card Brand", "Card Type",
+           "Has Chip", "Cards Issued", "Credit Limit", "Acct Open Date", "Year PIN last Changed",
+           "Card on Dark Web", "Current Age", "Retirement Age", "Birth Year", "Birth Month", "Gender",
+           "Latitude", "Longitude", "Per Capita Income - Zipcode", "Yearly Income - Person", "Total Debt",
+           "FICO Score", "Num Credit Cards", "Datetime", "Is Fraud"]
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
     """
     Transaction Frequency and Amount-Based Strategy:
     This strategy captures patterns in transaction frequency and amount-based statistics.
@@ -12,24 +20,22 @@ def strategy(original_df: pd.DataFrame):
     Useful for detecting spikes in spending frequency or deviations in transaction amounts.
     """
 
-    columns_to_drop = ["Merchant City", "Merchant State", "Year", "Month", "Day", "Person", "Zip", "CARD INDEX", 
-                       "Card Number", "CVV", "Expires", "Address", "Apartment", "City", "State", "Zipcode"]
+    if cache is None:
+        cache = FeatureCache(data=original_df)
+
+    df = cache.frame(COLUMNS)
 
-    df = original_df.drop(columns_to_drop, axis=1)
-    
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-    df['Hour'] = df['Datetime'].dt.hour
-    df['DayOfWeek'] = df['Datetime'].dt.dayofweek
-    df = df.sort_values(['User', 'Datetime'])
+    df['Hour'] = cache.column('Hour')
+    df['DayOfWeek'] = cache.column('DayOfWeek')
 
     # Add transaction frequency features
-    df['TimeSinceLastTransaction'] = df.groupby('User')['Datetime'].diff().dt.total_seconds() / 60  # in minutes
-    df['TimeSinceLastTransaction'] = df['TimeSinceLastTransaction'].fillna(0)
+    df['TimeSinceLastTransaction'] = cache.column('TimeSinceLastTransaction').fillna(0)  # in minutes
 
     # Rolling statistics on amount
-    df['WeeklyTransactionCount'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).count())
-    df['MonthlyTransactionCount'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=30, min_periods=1).count())
-    df['StdDevTransactionAmount'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).std()).fillna(0)
+    rolling = cache.rolling('Amount', windows=[7, 30], stats=['count', 'std'])
+    df['WeeklyTransactionCount'] = rolling[('count', 7)]
+    df['MonthlyTransactionCount'] = rolling[('count', 30)]
+    df['StdDevTransactionAmount'] = rolling[('std', 7)].fillna(0)
 
     # Ratios
     df['AmountToCreditLimitRatio'] = df['Amount'] / df['Credit Limit']
@@ -1,7 +1,15 @@
 import pandas as pd
 import numpy as np
+from lib.FeatureCache import FeatureCache
 
-def strategy(original_df: pd.DataFrame):
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Amount", "Use Chip", "Merchant Name", "MCC", "Errors?", "Card Brand", "Card Type",
+           "Has Chip", "Cards Issued", "Credit Limit", "Acct Open Date", "Year PIN last Changed", "Current Age",
+           "Retirement Age", "Birth Year", "Birth Month", "Gender", "Latitude", "Longitude",
+           "Per Capita Income - Zipcode", "Yearly Income - Person", "Total Debt", "FICO Score",
+           "Num Credit Cards", "Datetime", "Is Fraud"]
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
     """
     Comprehensive Feature Extraction Strategy:
     This strategy combines time-based, demographic, financial, and transaction-based features to provide a rich dataset for fraud detection.
@@ -23,25 +31,20 @@ def strategy(original_df: pd.DataFrame):
     This strategy provides a comprehensive feature set that helps detect anomalous transactions by focusing on time, spending behavior, geographic area, and user demographics.
     """
 
-    columns_to_drop = [ "Merchant City", "Merchant State", "Year", "Month", "Day", "Person", "Zip", "CARD INDEX", 
-    "Card Number", "CVV", "Expires", "Address", "Apartment", "City", "State", "Zipcode", "Card on Dark Web"
-    ]
-
-    df = original_df.drop(columns_to_drop, axis=1)
+    if cache is None:
+        cache = FeatureCache(data=original_df)
 
-    # Convert to datetime if not already done
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
+    df = cache.frame(COLUMNS)
 
     # Extract hour, day of the week, and month
-    df['Hour'] = df['Datetime'].dt.hour
-    df['DayOfWeek'] = df['Datetime'].dt.dayofweek  # Monday=0, Sunday=6
-    df['MonthOfYear'] = df['Datetime'].dt.month
+    df['Hour'] = cache.column('Hour')
+    df['DayOfWeek'] = cache.column('DayOfWeek')  # Monday=0, Sunday=6
+    df['MonthOfYear'] = cache.column('MonthOfYear')
 
-    df = df.sort_values(['User', 'Datetime'])
-    df['TimeSinceLastTransaction'] = df.groupby('User')['Datetime'].diff().dt.total_seconds() / 60  # in minutes
-    df['TimeSinceLastTransaction'] = df['TimeSinceLastTransaction'].fillna(0)
-    df['AvgTransactionAmountWeek'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).mean())
-    df['AvgTransactionAmountMonth'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=30, min_periods=1).mean())
+    df['TimeSinceLastTransaction'] = cache.column('TimeSinceLastTransaction').fillna(0)  # in minutes
+    rolling = cache.rolling('Amount', windows=[7, 30], stats=['mean'])
+    df['AvgTransactionAmountWeek'] = rolling[('mean', 7)]
+    df['AvgTransactionAmountMonth'] = rolling[('mean', 30)]
 
     def handle_inf(col: str):
         df[col] = df[col].replace([np.inf, -np.inf], np.nan)
@@ -60,11 +63,10 @@ def strategy(original_df: pd.DataFrame):
     df['DebtToIncomeRatio'] = df['Total Debt'] / df['Yearly Income - Person']
     df['CardUsageRatio'] = df['Num Credit Cards'] / df['Cards Issued']
     df['YearsToRetirement'] = df['Retirement Age'] - df['Current Age']
-    df['Acct Open Date'] = pd.to_datetime(df['Acct Open Date'])
-    df['Account Age (Days)'] = (df['Datetime'] - df['Acct Open Date']).dt.days
+    df['Account Age (Days)'] = cache.column('Account Age (Days)')
     df['Age Group'] = pd.cut(df['Current Age'], bins=[0, 25, 35, 45, 60, 100], labels=['18-25', '26-35', '36-45', '46-60', '60+'])
     df['Is Retired'] = df['Current Age'] >= df['Retirement Age']
-    df['Bad PIN Error'] = df['Errors?'] == "Bad PIN"
+    df['Bad PIN Error'] = cache.lookup('bad_pin')
 
     df = df.drop(["User", "Card", "Merchant Name", "Errors?", "Card Brand", "Acct Open Date", "Year PIN last Changed", "Birth Year", "Birth Month"], axis=1)
     return df
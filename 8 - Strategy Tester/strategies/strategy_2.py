@@ -1,34 +1,40 @@
 import pandas as pd
 import numpy as np
+from lib.FeatureCache import FeatureCache
 
-def strategy(original_df: pd.DataFrame):
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Amount", "Use Chip", "Merchant Name", "Merchant City", "Merchant State", "Zip",
+           "MCC", "Errors?", "Card Brand", "Card Type", "Has Chip", "Cards Issued", "Credit Limit",
+           "Acct Open Date", "Year PIN last Changed", "Person", "Current Age", "Retirement Age", "Birth Year",
+           "Birth Month", "Gender", "State", "Latitude", "Longitude", "Per Capita Income - Zipcode",
+           "Yearly Income - Person", "Total Debt", "FICO Score", "Num Credit Cards", "Datetime", "Is Fraud"]
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
     """
     Geolocation and Merchant-Based Strategy:
     This strategy extracts features based on geographic location and merchant behaviors.
     Features include:
-    - Distance between consecutive transactions (indicative of geographic changes).
+    - Distance and implied travel speed between consecutive transactions (indicative of geographic changes).
     - State change in transactions and high-risk MCC categorization.
     Useful for identifying unusual geographic shifts or transactions with high-risk merchant categories.
     """
 
-    columns_to_drop = ["Year", "Month", "Day", "CARD INDEX", "Card Number", "CVV", "Expires", "Address", "Apartment", 
-                       "City", "Zipcode", "Card on Dark Web"]
+    if cache is None:
+        cache = FeatureCache(data=original_df)
 
-    df = original_df.drop(columns_to_drop, axis=1)
+    df = cache.frame(COLUMNS)
 
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-    df['Hour'] = df['Datetime'].dt.hour
-    df['DayOfWeek'] = df['Datetime'].dt.dayofweek
-    df = df.sort_values(['User', 'Datetime'])
+    df['Hour'] = cache.column('Hour')
+    df['DayOfWeek'] = cache.column('DayOfWeek')
 
     # Add features based on geographical location
-    df['TransactionDistance'] = df.groupby('User').apply(
-        lambda x: np.sqrt((x['Latitude'] - x['Latitude'].shift()) ** 2 + (x['Longitude'] - x['Longitude'].shift()) ** 2)
-    ).reset_index(level=0, drop=True).fillna(0)
+    geo = cache.geo('User')
+    df['TransactionDistance'] = geo['distance_km'].fillna(0)  # haversine, in km
+    df['TravelSpeed'] = geo['speed_kmh'].fillna(0)  # implied km/h since the previous transaction
 
     # Merchant type-based features
-    df['MerchantStateChange'] = df['Merchant State'] != df.groupby('User')['Merchant State'].shift()
-    df['HighRiskMCC'] = df['MCC'].apply(lambda x: 1 if x in [4814, 5411, 5813, 5999] else 0)
+    df['MerchantStateChange'] = df['Merchant State'] != cache.previous('Merchant State', 'User')
+    df['HighRiskMCC'] = cache.lookup('high_risk_mcc').astype(int)
 
     df = df.drop(["User", "Card", "Merchant Name", "Merchant City", "Merchant State", "Errors?", "Card Brand", 
                   "Acct Open Date", "Year PIN last Changed", "Birth Year", "Birth Month", "Zip"], axis=1)
@@ -1,7 +1,15 @@
 import pandas as pd
 import numpy as np
+from lib.FeatureCache import FeatureCache
 
-def strategy(original_df: pd.DataFrame):
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Amount", "Use Chip", "Merchant Name", "Zip", "MCC", "Errors?", "Card Brand",
+           "Card Type", "Has Chip", "Cards Issued", "Credit Limit", "Acct Open Date", "Year PIN last Changed",
+           "Card on Dark Web", "Person", "Current Age", "Retirement Age", "Birth Year", "Birth Month", "Gender",
+           "Latitude", "Longitude", "Per Capita Income - Zipcode", "Yearly Income - Person", "Total Debt",
+           "FICO Score", "Num Credit Cards", "Datetime", "Is Fraud"]
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
     """
     User Demographic and Financial Profile Strategy:
     This strategy extracts features based on the user's demographic and financial characteristics.
@@ -11,10 +19,10 @@ def strategy(original_df: pd.DataFrame):
     Useful for detecting unusual spending relative to the user's typical financial behavior.
     """
 
-    columns_to_drop = ["Merchant City", "Merchant State", "Year", "Month", "Day", "CARD INDEX", "Card Number", 
-                       "CVV", "Expires", "Address", "Apartment", "City", "State", "Zipcode"]
+    if cache is None:
+        cache = FeatureCache(data=original_df)
 
-    df = original_df.drop(columns_to_drop, axis=1)
+    df = cache.frame(COLUMNS)
 
     # Calculate financial and demographic ratios
     df['IncomeToSpendingRatio'] = df['Yearly Income - Person'] / df['Amount']
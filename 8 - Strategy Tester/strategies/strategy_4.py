@@ -1,7 +1,15 @@
 import pandas as pd
 import numpy as np
+from lib.FeatureCache import FeatureCache
 
-def strategy(original_df: pd.DataFrame):
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Year", "Month", "Day", "Amount", "Use Chip", "Merchant Name", "MCC", "Errors?",
+           "Card Brand", "Card Type", "Has Chip", "Cards Issued", "Credit Limit", "Acct Open Date",
+           "Year PIN last Changed", "Person", "Current Age", "Retirement Age", "Birth Year", "Birth Month",
+           "Gender", "Latitude", "Longitude", "Per Capita Income - Zipcode", "Yearly Income - Person",
+           "Total Debt", "FICO Score", "Num Credit Cards", "Datetime", "Is Fraud"]
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
     """
     Time-Series Patterns and Temporal Analysis Strategy:
     This strategy extracts features based on time-series and temporal patterns.
@@ -11,24 +19,23 @@ def strategy(original_df: pd.DataFrame):
     Useful for detecting deviations in typical transaction times and frequencies.
     """
 
-    columns_to_drop = ["Merchant City", "Merchant State", "CARD INDEX", "Card Number", "CVV", "Expires", "Address", 
-                       "Apartment", "City", "State", "Zipcode", "Zip", "Card on Dark Web"]
+    if cache is None:
+        cache = FeatureCache(data=original_df)
 
-    df = original_df.drop(columns_to_drop, axis=1)
+    df = cache.frame(COLUMNS)
 
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-    df['Hour'] = df['Datetime'].dt.hour
-    df['DayOfWeek'] = df['Datetime'].dt.dayofweek
-    df['IsWeekend'] = df['DayOfWeek'] >= 5
-    df = df.sort_values(['User', 'Datetime'])
+    df['Hour'] = cache.column('Hour')
+    df['DayOfWeek'] = cache.column('DayOfWeek')
+    df['IsWeekend'] = cache.column('IsWeekend')
 
     # User transaction frequency patterns
-    df['TimeSinceLastTransaction'] = df.groupby('User')['Datetime'].diff().dt.total_seconds() / 60
-    df['TimeSinceLastTransaction'] = df['TimeSinceLastTransaction'].fillna(df['TimeSinceLastTransaction'].mean())
+    time_since_last = cache.column('TimeSinceLastTransaction')
+    df['TimeSinceLastTransaction'] = time_since_last.fillna(time_since_last.mean())
 
     # Rolling transaction statistics
-    df['WeeklyTransactionMean'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).mean())
-    df['WeeklyTransactionStdDev'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).std()).fillna(0)
+    rolling = cache.rolling('Amount', windows=[7], stats=['mean', 'std'])
+    df['WeeklyTransactionMean'] = rolling[('mean', 7)]
+    df['WeeklyTransactionStdDev'] = rolling[('std', 7)].fillna(0)
 
     df = df.drop(["User", "Card", "Merchant Name", "Errors?", "Card Brand", "Acct Open Date", "Year PIN last Changed"], axis=1)
     return df
@@ -1,7 +1,19 @@
 import pandas as pd
 import numpy as np
+from lib.FeatureCache import FeatureCache
+from lib.RiskLookup import RiskLookup
 
-def strategy(original_df: pd.DataFrame):
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Amount", "Use Chip", "Merchant Name", "Zip", "MCC", "Errors?", "Card Brand",
+           "Card Type", "Has Chip", "Cards Issued", "Credit Limit", "Acct Open Date", "Year PIN last Changed",
+           "Card on Dark Web", "Person", "Current Age", "Retirement Age", "Birth Year", "Birth Month", "Gender",
+           "Latitude", "Longitude", "Per Capita Income - Zipcode", "Yearly Income - Person", "Total Debt",
+           "FICO Score", "Num Credit Cards", "Datetime", "Is Fraud"]
+
+# High-risk MCCs of this strategy, including wire transfers (4829)
+RiskLookup.register('high_risk_mcc_transfers', 'MCC', values=[4829, 5411, 5813, 5999])
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
     """
     Risk-Weighted Features and High-Risk Transaction Detection Strategy:
     This strategy extracts features associated with high-risk transactions.
@@ -11,18 +23,14 @@ def strategy(original_df: pd.DataFrame):
     Useful for identifying transactions with characteristics linked to higher fraud probability.
     """
 
-    columns_to_drop = ["Merchant City", "Merchant State", "Year", "Month", "Day", "CARD INDEX", "Card Number", 
-                       "CVV", "Expires", "Address", "Apartment", "City", "State", "Zipcode"]
-
-    df = original_df.drop(columns_to_drop, axis=1)
+    if cache is None:
+        cache = FeatureCache(data=original_df)
 
-    # Date conversion and feature extraction
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-    df = df.sort_values(['User', 'Datetime'])
+    df = cache.frame(COLUMNS)
 
     # High-risk amount feature
     df['HighRiskAmount'] = df['Amount'] > (0.8 * df['Credit Limit'])
-    df['HighRiskMCC'] = df['MCC'].apply(lambda x: 1 if x in [4829, 5411, 5813, 5999] else 0)
+    df['HighRiskMCC'] = cache.lookup('high_risk_mcc_transfers').astype(int)
 
     # Ratio features
     df['AmountToCreditLimitRatio'] = df['Amount'] / df['Credit Limit']
@@ -1,7 +1,15 @@
 import pandas as pd
 import numpy as np
+from lib.FeatureCache import FeatureCache
 
-def strategy(original_df: pd.DataFrame):
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Amount", "Use Chip", "Merchant Name", "Merchant State", "MCC", "Errors?",
+           "Card Brand", "Card Type", "Has Chip", "Cards Issued", "Credit Limit", "Acct Open Date",
+           "Year PIN last Changed", "Current Age", "Retirement Age", "Birth Year", "Birth Month", "Gender",
+           "Latitude", "Longitude", "Per Capita Income - Zipcode", "Yearly Income - Person", "Total Debt",
+           "FICO Score", "Num Credit Cards", "Datetime", "Is Fraud"]
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
     """
     Super Strategy:
     This comprehensive feature extraction strategy combines the best features from various individual strategies.
@@ -14,35 +22,32 @@ def strategy(original_df: pd.DataFrame):
     This strategy is designed to capture a wide range of features to identify potentially fraudulent transactions.
     """
 
-    # Columns to drop that are less useful for predictive modeling
-    columns_to_drop = ["Merchant City", "Year", "Month", "Day", "Person", "Zip", "CARD INDEX", 
-                       "Card Number", "CVV", "Expires", "Address", "Apartment", "City", "State", "Zipcode", "Card on Dark Web"]
+    if cache is None:
+        cache = FeatureCache(data=original_df)
 
-    df = original_df.drop(columns_to_drop, axis=1)
-    
-    # Convert date column to datetime format
-    df['Datetime'] = pd.to_datetime(df['Datetime'], errors='coerce')
-    df = df.sort_values(['User', 'Datetime'])
+    # Shared frame is already parsed and sorted by user and datetime
+    df = cache.frame(COLUMNS)
     
     # Temporal features
-    df['Hour'] = df['Datetime'].dt.hour
-    df['DayOfWeek'] = df['Datetime'].dt.dayofweek
-    df['IsWeekend'] = df['DayOfWeek'] >= 5
-    df['TimeSinceLastTransaction'] = df.groupby('User')['Datetime'].diff().dt.total_seconds() / 60  # in minutes
-    df['TimeSinceLastTransaction'] = df['TimeSinceLastTransaction'].fillna(df['TimeSinceLastTransaction'].mean())
+    df['Hour'] = cache.column('Hour')
+    df['DayOfWeek'] = cache.column('DayOfWeek')
+    df['IsWeekend'] = cache.column('IsWeekend')
+    time_since_last = cache.column('TimeSinceLastTransaction')
+    df['TimeSinceLastTransaction'] = time_since_last.fillna(time_since_last.mean())  # in minutes
     
     # Rolling statistics on amount
-    df['WeeklyTransactionCount'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).count())
-    df['MonthlyTransactionCount'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=30, min_periods=1).count())
-    df['StdDevTransactionAmount'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).std()).fillna(0)
-    df['WeeklyTransactionMean'] = df.groupby('User')['Amount'].transform(lambda x: x.rolling(window=7, min_periods=1).mean())
+    rolling = cache.rolling('Amount', windows=[7, 30], stats=['count', 'std', 'mean'])
+    df['WeeklyTransactionCount'] = rolling[('count', 7)]
+    df['MonthlyTransactionCount'] = rolling[('count', 30)]
+    df['StdDevTransactionAmount'] = rolling[('std', 7)].fillna(0)
+    df['WeeklyTransactionMean'] = rolling[('mean', 7)]
 
     # Geolocation features
-    df['TransactionDistance'] = df.groupby('User').apply(
-        lambda x: np.sqrt((x['Latitude'] - x['Latitude'].shift()) ** 2 + (x['Longitude'] - x['Longitude'].shift()) ** 2)
-    ).reset_index(level=0, drop=True).fillna(0)
-    df['MerchantStateChange'] = df['Merchant State'] != df.groupby('User')['Merchant State'].shift()
-    df['HighRiskMCC'] = df['MCC'].apply(lambda x: 1 if x in [4814, 5411, 5813, 5999] else 0)
+    geo = cache.geo('User')
+    df['TransactionDistance'] = geo['distance_km'].fillna(0)  # haversine, in km
+    df['TravelSpeed'] = geo['speed_kmh'].fillna(0)  # implied km/h since the previous transaction
+    df['MerchantStateChange'] = df['Merchant State'] != cache.previous('Merchant State', 'User')
+    df['HighRiskMCC'] = cache.lookup('high_risk_mcc').astype(int)
 
     # High-risk features
     df['HighRiskAmount'] = df['Amount'] > (0.8 * df['Credit Limit'])
@@ -59,11 +64,10 @@ def strategy(original_df: pd.DataFrame):
     df['Is Retired'] = df['Current Age'] >= df['Retirement Age']
 
     # Account-based feature
-    df['Acct Open Date'] = pd.to_datetime(df['Acct Open Date'])
-    df['Account Age (Days)'] = (df['Datetime'] - df['Acct Open Date']).dt.days
+    df['Account Age (Days)'] = cache.column('Account Age (Days)')
     
     # Additional binary flags
-    df['Bad PIN Error'] = df['Errors?'] == "Bad PIN"
+    df['Bad PIN Error'] = cache.lookup('bad_pin')
 
     # Drop columns that are no longer needed after feature extraction
     df = df.drop(["User", "Card", "Merchant Name", "Errors?", "Card Brand", "Acct Open Date", "Year PIN last Changed", 
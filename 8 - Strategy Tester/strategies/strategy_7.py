@@ -0,0 +1,46 @@
+import pandas as pd
+import numpy as np
+from lib.FeatureCache import FeatureCache
+
+# Input columns read from the clean transactions file
+COLUMNS = ["User", "Card", "Amount", "Use Chip", "Merchant Name", "MCC", "Errors?", "Card Brand", "Card Type",
+           "Has Chip", "Cards Issued", "Credit Limit", "Acct Open Date", "Year PIN last Changed", "Current Age",
+           "Retirement Age", "Birth Year", "Birth Month", "Gender", "Latitude", "Longitude",
+           "Per Capita Income - Zipcode", "Yearly Income - Person", "Total Debt", "FICO Score",
+           "Num Credit Cards", "Datetime", "Is Fraud"]
+
+def strategy(original_df: pd.DataFrame, cache: FeatureCache = None):
+    """
+    Time-Window Velocity Strategy:
+    This strategy measures how fast a user and each of their cards are transacting over real time windows.
+    Features include:
+    - Number of transactions in the last 1 hour, 24 hours, 7 days and 30 days, per user and per card.
+    - Total amount spent over the same windows, per user and per card.
+    - Share of the user's 24-hour activity made on the current card.
+    Useful for detecting bursts of card testing or rapid spending after a card is compromised.
+    """
+
+    if cache is None:
+        cache = FeatureCache(data=original_df)
+
+    df = cache.frame(COLUMNS)
+
+    df['Hour'] = cache.column('Hour')
+    df['TimeSinceLastTransaction'] = cache.column('TimeSinceLastTransaction').fillna(0)  # in minutes
+
+    # Time-based velocity per user and per card
+    windows = ['1h', '24h', '7D', '30D']
+    for level, group_cols in [('User', 'User'), ('Card', ['User', 'Card'])]:
+        velocity = cache.velocity(group_cols, windows=windows, column='Amount', stats=['count', 'sum'])
+        for window in windows:
+            df[f'{level}TransactionCount_{window}'] = velocity[('count', window)]
+            df[f'{level}AmountSum_{window}'] = velocity[('sum', window)].fillna(0)
+
+    df['CardShareOfUserCount_24h'] = df['CardTransactionCount_24h'] / df['UserTransactionCount_24h']
+
+    # Ratios
+    df['AmountToCreditLimitRatio'] = df['Amount'] / df['Credit Limit']
+
+    df = df.drop(["User", "Card", "Merchant Name", "Errors?", "Card Brand", "Acct Open Date", "Year PIN last Changed",
+                  "Birth Year", "Birth Month"], axis=1)
+    return df
@@ -0,0 +1,38 @@
+import polars as pl
+
+BACKEND = "polars"
+
+def strategy(transactions: pl.LazyFrame) -> pl.LazyFrame:
+    """
+    Lazy Polars Temporal Strategy:
+    This strategy expresses the time-series features as a lazy Polars query, so only the needed columns are read
+    and all per-user windows run multi-threaded.
+    Features include:
+    - Transaction hour, weekday/weekend flags and time since the last transaction.
+    - Mean and standard deviation of the amount over the last 7 days (time-based, not row-based).
+    - Ratio of the amount to the user's previous transaction.
+    Useful for detecting deviations in typical transaction times, frequencies and amounts.
+    """
+
+    columns_to_drop = ["Merchant City", "Merchant State", "CARD INDEX", "Card Number", "CVV", "Expires", "Address", 
+                       "Apartment", "City", "State", "Zipcode", "Zip", "Card on Dark Web"]
+
+    df = transactions.drop(columns_to_drop).sort(['User', 'Datetime'], maintain_order=True)
+
+    df = df.with_columns(
+        pl.col('Datetime').dt.hour().alias('Hour'),
+        (pl.col('Datetime').dt.weekday() - 1).alias('DayOfWeek'),  # Monday=0, Sunday=6
+        (pl.col('Datetime').diff().dt.total_seconds().over('User') / 60).alias('TimeSinceLastTransaction'),
+
+        # Time-based rolling statistics per user
+        pl.col('Amount').rolling_mean_by('Datetime', window_size='7d').over('User').alias('WeeklyTransactionMean'),
+        pl.col('Amount').rolling_std_by('Datetime', window_size='7d').over('User').fill_null(0).alias('WeeklyTransactionStdDev'),
+        (pl.col('Amount') / pl.col('Amount').shift(1).over('User')).alias('AmountToPreviousRatio'),
+    )
+
+    df = df.with_columns(
+        (pl.col('DayOfWeek') >= 5).alias('IsWeekend'),
+        pl.col('TimeSinceLastTransaction').fill_null(pl.col('TimeSinceLastTransaction').mean()),
+    )
+
+    return df.drop(["User", "Card", "Merchant Name", "Errors?", "Card Brand", "Acct Open Date", "Year PIN last Changed"])
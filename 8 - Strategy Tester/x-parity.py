@@ -0,0 +1,44 @@
+import sys
+import argparse
+import pandas as pd
+from lib.Logger import Logger
+from lib.FeatureParityChecker import FeatureParityChecker
+
+# Configuration
+data_path = "data/clean_transactions.pq"
+strategies = ["strategy_2", "strategy_7"]  # Pandas strategies taking a cache
+start = None  # First date of the replayed slice (None for the earliest transaction)
+rows = 10_000  # Transactions replayed one by one
+save_to = "results/feature_parity.csv"  # Per-column report of every strategy
+expected_mismatches = {  # Columns the strategies compute from statistics of the whole frame
+    "strategy_1": ["AmountToCreditLimitRatio"],
+    "strategy_4": ["TimeSinceLastTransaction"],
+    "strategy_6": ["TimeSinceLastTransaction"],
+}
+
+# Check that the online features still match the batch strategies, e.g. after changing OnlineFeatureCache:
+#   python x-parity.py --strategies strategy_2 strategy_7 --rows 5000
+# Exits with status 1 when a column differs beyond tolerance.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare online and batch features of strategies.")
+    parser.add_argument("--data", default=data_path)
+    parser.add_argument("--strategies", nargs="+", default=strategies)
+    parser.add_argument("--start", default=start)
+    parser.add_argument("--rows", type=int, default=rows)
+    parser.add_argument("--save-to", default=save_to)
+    args = parser.parse_args()
+
+    Logger("feature-parity")
+    reports, failed = [], False
+    for strategy in args.strategies:
+        checker = FeatureParityChecker(strategy, expected_mismatches=expected_mismatches.get(strategy))
+        summary, columns = checker.check(args.data, start=args.start, rows=args.rows)
+        reports.append(columns.assign(strategy=strategy))
+        failed |= bool(summary['failing_columns'])
+        print(f"{strategy}: {summary['events']} events, failing columns {summary['failing_columns'] or 'none'}, "
+              f"latency p50 {summary['latency_p50_ms']:.2f} ms, p95 {summary['latency_p95_ms']:.2f} ms, "
+              f"p99 {summary['latency_p99_ms']:.2f} ms, state p50 {summary['state_p50_us']:.0f} µs")
+
+    if args.save_to:
+        pd.concat(reports, ignore_index=True).to_csv(args.save_to, index=False)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,104 @@
+import sys
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from lib.GroupedRolling import GroupedRolling
+from lib.TransactionReader import read_transactions
+
+# Configuration
+data_path = "data/clean_transactions.pq"
+rows = 4_000_000  # Transactions checked (None for the whole file)
+synthetic = False  # Check generated users with long runs of identical amounts instead of the data file
+windows = [7, 30]
+stats = list(GroupedRolling.STATS)
+rtol = 1e-9  # Relative tolerance of sum, mean and variance
+ulps = 64  # Rounding allowed to the prefix sums, in machine epsilons of their magnitude (see below)
+chunk_size = 200_000  # Rows whose windows are gathered at once for the reference
+
+# Check GroupedRolling against an exact reference computed window by window, e.g. after changing it:
+#   python x-rolling-check.py --rows 4000000
+# The reference gathers every window and takes NumPy's two-pass statistics of it. Count, min and max
+# must be equal and windows whose values are all equal must have a variance of exactly 0. Sums,
+# means and variances come from prefix sums, whose rounding grows with the history of the group
+# before the window: they may differ by `ulps` machine epsilons of that prefix, far below the error
+# of a wrong window. The standard deviation is checked through the variance. Exits with status 1
+# on a mismatch.
+
+
+def reference(grouped, values, window):
+    """Exact rolling statistics of every row, from the window's values gathered as a matrix."""
+    results = {stat: np.empty(len(values)) for stat in ('count', 'sum', 'mean', 'var', 'min', 'max')}
+    for start in range(0, len(values), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(values)))
+        positions = rows[:, None] - np.arange(window)[None, :]
+        inside = positions >= grouped.row_start[rows][:, None]
+        matrix = np.where(inside, values[np.maximum(positions, 0)], np.nan)
+        count = (~np.isnan(matrix)).sum(axis=1)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN windows and windows of one value
+            results['count'][rows] = count
+            results['sum'][rows] = np.where(count > 0, np.nansum(matrix, axis=1), np.nan)  # min_periods=1
+            results['mean'][rows] = np.nanmean(matrix, axis=1)
+            results['var'][rows] = np.where(count > 1, np.nanvar(matrix, axis=1, ddof=1), np.nan)
+            results['min'][rows] = np.nanmin(matrix, axis=1)
+            results['max'][rows] = np.nanmax(matrix, axis=1)
+    return results
+
+
+def prefix_magnitudes(users, values):
+    """Group-local running sums of |x - group mean| and (x - group mean)^2, the scale of GroupedRolling's rounding."""
+    centered = pd.Series(values).groupby(users, sort=False).transform(lambda group: group - group.mean())
+    centered = centered.fillna(0.0)
+    return (centered.abs().groupby(users, sort=False).cumsum().to_numpy(),
+            (centered ** 2).groupby(users, sort=False).cumsum().to_numpy())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare GroupedRolling with exact rolling statistics.")
+    parser.add_argument("--data", default=data_path)
+    parser.add_argument("--rows", type=int, default=rows)
+    parser.add_argument("--synthetic", action="store_true", default=synthetic)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rng = np.random.default_rng(42)
+        n = args.rows or 4_000_000
+        users = np.sort(rng.integers(0, max(n // 2000, 1), n))
+        amounts = pd.Series(np.round(rng.lognormal(3, 1.5, n), 2))
+        amounts = amounts.where(rng.random(n) >= 0.6).ffill().to_numpy().copy()  # Runs of identical amounts
+        amounts[rng.random(n) < 0.01] = np.nan
+    else:
+        df = read_transactions(args.data, ['User', 'Datetime', 'Amount'])
+        df = df.sort_values(['User', 'Datetime'], kind='stable').head(args.rows)
+        users, amounts = df['User'].to_numpy(), df['Amount'].to_numpy(dtype=np.float64)
+
+    grouped = GroupedRolling(users)
+    results = grouped.compute(amounts, windows, stats)
+    prefix_abs, prefix_square = prefix_magnitudes(users, amounts)
+    eps = np.finfo(np.float64).eps
+    failed = False
+    for window in windows:
+        expected = reference(grouped, amounts, window)
+        count = expected['count']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rounding = {'sum': ulps * eps * prefix_abs, 'mean': ulps * eps * prefix_abs / count,
+                        'var': ulps * eps * prefix_square / (count - 1)}
+        for stat in stats:
+            compared = 'var' if stat == 'std' else stat
+            actual = results[(compared, window)]
+            if compared in rounding:
+                with np.errstate(invalid='ignore'):
+                    equal = np.abs(actual - expected[compared]) <= rounding[compared] + rtol * np.abs(expected[compared])
+                equal |= np.isnan(actual) & np.isnan(expected[compared])
+            else:
+                equal = (actual == expected[compared]) | (np.isnan(actual) & np.isnan(expected[compared]))
+            mismatches = int((~equal).sum())
+            if stat in ('std', 'var'):
+                # Constant windows: exactly 0
+                constant = (count > 1) & (expected['min'] == expected['max'])
+                mismatches += int((constant & (results[(stat, window)] != 0)).sum())
+            failed |= bool(mismatches)
+            print(f"window {window} {stat}: {mismatches} of {len(amounts)} rows differ")
+    print("FAILED" if failed else "OK")
+    sys.exit(1 if failed else 0)
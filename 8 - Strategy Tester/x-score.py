@@ -0,0 +1,33 @@
+import argparse
+from lib.Logger import Logger
+from lib.BatchScorer import BatchScorer
+
+# Configuration
+test_name = "test-12"  # Test whose saved strategy, encoder and model are used
+strategy_name = "strategy_2"
+data_path = "data/new_transactions.pq"  # Transactions to score
+save_to = "data/scored_transactions.pq"
+batch_size = 500_000  # Rows per batch
+keep_columns = ["User", "Card", "Datetime"]  # Input columns copied next to the probability
+group_col = "User"  # Sort the file by it so every user is scored with its whole history
+
+# Score a parquet file with a trained strategy, e.g. in a nightly job:
+#   python x-score.py --test test-12 --strategy strategy_2 --data new.pq --save-to scored.pq
+# History features (velocities, distances) only see the transactions in the file. With the file sorted by
+# group_col they do not depend on --batch-size; otherwise they restart at every batch and a warning is logged.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score new transactions with a trained strategy.")
+    parser.add_argument("--test", default=test_name)
+    parser.add_argument("--strategy", default=strategy_name)
+    parser.add_argument("--data", default=data_path)
+    parser.add_argument("--save-to", default=save_to)
+    parser.add_argument("--batch-size", type=int, default=batch_size)
+    parser.add_argument("--keep-columns", nargs="*", default=keep_columns)
+    parser.add_argument("--group-col", default=group_col)
+    args = parser.parse_args()
+
+    Logger(args.test)
+    scorer = BatchScorer.load(f"tests/{args.test}", args.strategy)
+    stats = scorer.score_parquet(args.data, args.save_to, batch_size=args.batch_size, keep_columns=args.keep_columns,
+                                 group_col=args.group_col)
+    print(f"Scored {stats['rows']} rows in {stats['seconds']:.1f} s ({stats['rows_per_second']:.0f} rows/s)")
@@ -0,0 +1,27 @@
+import argparse
+from lib.Logger import Logger
+from lib.OnlineScorer import OnlineScorer
+
+# Configuration
+test_name = "test-12"  # Test whose saved strategy, encoder and model are used
+strategy_name = "strategy_2"  # Pandas strategy taking a cache
+history_path = "data/clean_transactions.pq"  # Past transactions loading the per-user state
+host = "127.0.0.1"
+port = 8080
+
+# Score single transactions as they arrive, e.g.:
+#   python x-serve.py --test test-12 --strategy strategy_2 --history data/clean_transactions.pq
+#   curl -X POST localhost:8080/score -d '{"User": 0, "Card": 0, "Datetime": "2020-01-01 12:00", ...}'
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve single-transaction fraud scores over HTTP.")
+    parser.add_argument("--test", default=test_name)
+    parser.add_argument("--strategy", default=strategy_name)
+    parser.add_argument("--history", default=history_path)
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+    args = parser.parse_args()
+
+    Logger(args.test)
+    scorer = OnlineScorer.load(f"tests/{args.test}", args.strategy)
+    scorer.warm_up(args.history)
+    scorer.serve(args.host, args.port)
@@ -26,20 +26,52 @@ model_params = {
 }
 
 evaluation_file = "evaluations.csv"
+n_jobs = 1  # Number of worker processes running strategies in parallel
+feature_store_dir = "feature_store"  # Reuse extracted features across runs (None to disable)
+feature_store_max_bytes = 20 * 1024 ** 3  # Least recently used frames are evicted above this size
+store_scaled = False  # Also store scaled and encoded frames
+compact_dtypes = True  # Downcast features to float32/int8/category before scaling
+fit_on_train = True  # Fit scaling and encoding on the training split only
+sparse_encoding = False  # Sparse one-hot columns, keeping high-cardinality categoricals
+high_cardinality_encoding = None  # 'frequency', 'target' or 'hashing' instead of dropping high-cardinality columns
+cv_folds = None  # Walk-forward folds from split_date to the last date (None for the single split)
+cv_mode = "expanding"  # 'expanding' or 'sliding' training windows
+resampling = None  # 'smote', 'undersample', 'subsample_smote' or 'reweight' (None: 'smote' if apply_smote)
+resampling_subsample = 0.1  # Fraction of the majority class kept by 'subsample_smote'
+measure_resampling_memory = False  # Trace the peak memory of resampling (slower; only with folds run one at a time)
+native_categorical = False  # Pass categoricals to the model as 'category' columns instead of one-hot encoding
+categorical_columns = ["MCC"]  # Numeric code columns also treated as categorical when native_categorical
 
 # Initialize and run the StrategyTester
-tester = StrategyTester(
-    test_name=test_name,
-    data_path=data_path,
-    split_date=split_date,
-    target_col=target_col,
-    datetime_col=datetime_col,
-    apply_smote=apply_smote,
-    smote_sampling_strategy=smote_sampling,
-    model_type=model_type,
-    model_params=model_params,
-    num_rounds=num_rounds,
-    evaluation_file=evaluation_file
-)
+# (the guard keeps worker processes from re-running the test when n_jobs > 1)
+if __name__ == "__main__":
+    tester = StrategyTester(
+        test_name=test_name,
+        data_path=data_path,
+        split_date=split_date,
+        target_col=target_col,
+        datetime_col=datetime_col,
+        apply_smote=apply_smote,
+        smote_sampling_strategy=smote_sampling,
+        model_type=model_type,
+        model_params=model_params,
+        num_rounds=num_rounds,
+        evaluation_file=evaluation_file,
+        n_jobs=n_jobs,
+        feature_store_dir=feature_store_dir,
+        feature_store_max_bytes=feature_store_max_bytes,
+        store_scaled=store_scaled,
+        compact_dtypes=compact_dtypes,
+        fit_on_train=fit_on_train,
+        sparse_encoding=sparse_encoding,
+        high_cardinality_encoding=high_cardinality_encoding,
+        cv_folds=cv_folds,
+        cv_mode=cv_mode,
+        resampling=resampling,
+        resampling_subsample=resampling_subsample,
+        measure_resampling_memory=measure_resampling_memory,
+        native_categorical=native_categorical,
+        categorical_columns=categorical_columns if native_categorical else None
+    )
 
-tester.run()
+    tester.run()
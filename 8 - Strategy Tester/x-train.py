@@ -0,0 +1,48 @@
+import os
+import argparse
+from lib.Logger import Logger
+from lib.ScaleEncode import ScaleEncode
+from lib.useModel import useModel
+
+# Configuration
+test_name = "test-13"
+data_path = "data/scaled_transactions.pq"  # Scaled and encoded features, e.g. from ScaleEncode.scale_and_encode_stream
+scale_encode_path = None  # Fitted ScaleEncode of the file, restores native categories in every batch (optional)
+model_name = "strategy_2"  # Saved as tests/<test_name>/<model_name>_model.joblib
+split_date = '2019-10-01 00:00:00'  # Rows before it are trained on
+target_col = "Is Fraud"
+datetime_col = "Datetime"
+weight_col = None  # Column of sample weights (optional)
+num_rounds = 75
+model_params = {
+    "objective": "binary:logistic",
+    "tree_method": "hist",
+    "max_bin": 256,
+}
+batch_size = 500_000  # Rows per batch
+cache_dir = "xgb_cache"  # External-memory cache on local disk (None keeps the quantized matrix in memory)
+
+# Train XGBoost on a parquet file larger than memory, e.g. on a CPU-only node:
+#   python x-train.py --data data/scaled_transactions.pq --cache-dir /tmp/xgb_cache
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train XGBoost on a scaled and encoded parquet file in batches.")
+    parser.add_argument("--test", default=test_name)
+    parser.add_argument("--data", default=data_path)
+    parser.add_argument("--scale-encode", default=scale_encode_path)
+    parser.add_argument("--model-name", default=model_name)
+    parser.add_argument("--split-date", default=split_date)
+    parser.add_argument("--batch-size", type=int, default=batch_size)
+    parser.add_argument("--cache-dir", default=cache_dir)
+    args = parser.parse_args()
+
+    Logger(args.test)
+    categories = None
+    if args.scale_encode:
+        state = ScaleEncode.load(args.scale_encode).state
+        categories = state['vocabularies'] if state.get('native_categorical') else None
+
+    model = useModel(model_type="XGBoost", params=model_params)
+    model.train_from_parquet(args.data, target_col, num_rounds, weight_col=weight_col, date_range=(None, args.split_date),
+                             datetime_col=datetime_col, batch_size=args.batch_size, categories=categories,
+                             cache_dir=args.cache_dir)
+    model.save(os.path.join("tests", args.test, f"{args.model_name}_model.joblib"))